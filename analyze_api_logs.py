@@ -4,7 +4,6 @@ API Log Analyzer for AI Email Categorizer Backend
 Analyzes CrashLens logs to provide insights into API usage, performance, and costs.
 """
 
-import json
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -12,6 +11,7 @@ from typing import Dict, List, Any
 from collections import Counter, defaultdict
 
 import click
+import orjson
 from loguru import logger
 
 try:
@@ -43,13 +43,14 @@ class APILogAnalyzer:
             return
         
         try:
-            with open(self.log_file_path, 'r') as f:
+            # Read raw bytes and let orjson decode them; no text-mode decode pass
+            append = self.events.append
+            with open(self.log_file_path, 'rb') as f:
                 for line_num, line in enumerate(f, 1):
                     if line.strip():
                         try:
-                            event = json.loads(line)
-                            self.events.append(event)
-                        except json.JSONDecodeError as e:
+                            append(orjson.loads(line))
+                        except orjson.JSONDecodeError as e:
                             logger.warning(f"Invalid JSON on line {line_num}: {e}")
             
             logger.info(f"Loaded {len(self.events)} log events")
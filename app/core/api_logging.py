@@ -2,12 +2,17 @@
 CrashLens logging integration for API call tracking.
 """
 
+import os
 import time
 import uuid
+import atexit
+import threading
+import orjson
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
-<<<<<<< HEAD
 
 # FastAPI imports
 from fastapi import Request
@@ -19,64 +24,159 @@ from ..core.logger import logger
 # Use the actual CrashLens Logger package
 from crashlens_logger import CrashLensLogger, LogEvent
 
+def _iso_z(dt: datetime) -> str:
+    """Format a UTC datetime as ISO 8601 with a 'Z' suffix, without string replacement."""
+    return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond:06d}Z"
+
+@dataclass(slots=True)
+class SimpleEvent:
+    """Minimal event in the simplified CrashLens log format."""
+    traceId: str
+    startTime: str
+    input: Dict[str, Any]
+    usage: Dict[str, int]
+    type: str = "generation"
+    cost: float = 0.0
+
 # Create a wrapper class to handle crashlens-logger v0.1.0 bugs
 class SafeCrashLensLogger(CrashLensLogger):
-    """Wrapper to handle bugs in crashlens-logger v0.1.0"""
+    """
+    Wrapper to handle bugs in crashlens-logger v0.1.0.
+    
+    write_logs only encodes events and queues them in memory; a background
+    thread appends the queued lines to disk, so request handlers never wait
+    on file I/O. Call flush() to force pending lines out (close() on shutdown).
+    """
+    
+    # Pending lines are written at least this often...
+    FLUSH_INTERVAL_SECONDS = 0.5
+    # ...or as soon as this many bytes are queued
+    FLUSH_THRESHOLD_BYTES = 1024 * 1024
+    # Lines that failed to write are retried until this many bytes are queued, then dropped
+    MAX_PENDING_BYTES = 16 * 1024 * 1024
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending: Dict[str, List[bytes]] = defaultdict(list)
+        self._pending_bytes = 0
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # One append-only descriptor per log file, opened on first flush
+        self._fds: Dict[str, int] = {}
+        self._flusher = threading.Thread(target=self._drain, name="crashlens-log-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
     
     def write_logs(self, events, output_path: str) -> None:
-        """Safe write_logs that handles missing attributes and writes in simple format."""
-        from pathlib import Path
-        import json
-        
-        # Ensure directory exists
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        # Write events manually in simplified format
-        with open(output_path, 'a', encoding='utf-8') as f:
-            for event in events:
-                try:
+        """Encode events in simple format and queue them for the background flusher."""
+        lines = []
+        for event in events:
+            try:
+                if type(event) is SimpleEvent:
+                    # Every in-app call site builds a SimpleEvent, so read its
+                    # fields directly instead of probing with getattr defaults
+                    simple_log = {
+                        "traceId": event.traceId,
+                        "type": event.type,
+                        "startTime": event.startTime,
+                        "input": {k: v for k, v in event.input.items() if k != 'prompt'},
+                        "usage": event.usage,
+                        "cost": event.cost
+                    }
+                else:
                     # Create simplified log format like the example
                     input_data = getattr(event, 'input', {})
                     # Remove prompt from input to keep logs clean
-=======
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-
-from ..core.logger import logger
-
-# Use the actual CrashLens Logger package
-from crashlens_logger import CrashLensLogger
-
-class SafeCrashLensLogger(CrashLensLogger):
-    """Wrapper to handle bugs in crashlens-logger v0.1.0"""
-    
-    def write_logs(self, events: List[Any], output_path: str) -> None:
-        """Safe write_logs that handles missing attributes and writes in simple format. Accepts a list of any event objects."""
-        from pathlib import Path
-        import json
-        
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'a', encoding='utf-8') as f:
-            for event in events:
-                try:
-                    input_data = getattr(event, 'input', {})
->>>>>>> 94bb2a09def6d5cf440c6b59f6eebedb12e9c613
                     clean_input = {k: v for k, v in input_data.items() if k != 'prompt'}
                     
                     simple_log = {
-                        "traceId": getattr(event, 'traceId', str(uuid.uuid4())),
+                        "traceId": getattr(event, 'traceId', None) or str(uuid.uuid4()),
                         "type": getattr(event, 'type', 'generation'),
-                        "startTime": getattr(event, 'startTime', datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')),
+                        "startTime": getattr(event, 'startTime', None) or _iso_z(datetime.now(timezone.utc)),
                         "input": clean_input,
                         "usage": getattr(event, 'usage', {}),
                         "cost": getattr(event, 'cost', 0.0)
                     }
-                    
-                    json.dump(simple_log, f, ensure_ascii=False, default=str)
-                    f.write('\n')
-                except Exception as write_error:
-                    logger.warning(f"Failed to write individual log event: {write_error}")
+                
+                lines.append(orjson.dumps(simple_log, default=str, option=orjson.OPT_APPEND_NEWLINE))
+            except Exception as write_error:
+                logger.warning(f"Failed to write individual log event: {write_error}")
+        
+        if not lines:
+            return
+        with self._pending_lock:
+            self._pending[output_path].extend(lines)
+            self._pending_bytes += sum(len(line) for line in lines)
+            if self._pending_bytes >= self.FLUSH_THRESHOLD_BYTES:
+                self._wakeup.set()
+        if self._closed:
+            # Nothing is draining the queue any more; write straight through
+            self.flush()
+    
+    def flush(self) -> None:
+        """Append all queued lines to their files, requeueing whatever a failed write left behind."""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, defaultdict(list)
+                self._pending_bytes = 0
+            for output_path, lines in pending.items():
+                data = memoryview(b''.join(lines))
+                written = 0
+                try:
+                    fd = self._get_fd(output_path)
+                    # os.write may accept only part of the buffer; keep writing the rest
+                    while written < len(data):
+                        written += os.write(fd, data[written:])
+                except Exception as e:
+                    self._requeue(output_path, lines, data[written:].tobytes(), e)
+    
+    def _requeue(self, output_path: str, lines: List[bytes], unwritten: bytes, error: Exception) -> None:
+        """Put the unwritten tail of a failed flush back at the head of the queue, or drop it if the queue is full."""
+        # Events whose line was not completely written
+        lost_events = 0
+        remaining = len(unwritten)
+        for line in reversed(lines):
+            if remaining <= 0:
+                break
+            lost_events += 1
+            remaining -= len(line)
+        with self._pending_lock:
+            if self._pending_bytes + len(unwritten) > self.MAX_PENDING_BYTES:
+                logger.error(f"Dropped {lost_events} log events for {output_path} after a failed flush: {error}")
+                return
+            self._pending[output_path].insert(0, unwritten)
+            self._pending_bytes += len(unwritten)
+        logger.error(f"Failed to flush {lost_events} log events to {output_path}, will retry: {error}")
+    
+    def close(self) -> None:
+        """Stop the background flusher, write anything still queued and close the log files."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._flush_lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+    
+    def _get_fd(self, output_path: str) -> int:
+        """Return the append-only descriptor for a log file, creating it on first use."""
+        fd = self._fds.get(output_path)
+        if fd is None:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._fds[output_path] = fd
+        return fd
+    
+    def _drain(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            self.flush()
 
 class APICallLogger:
     """Handles API call logging using CrashLens Logger."""
@@ -114,22 +214,16 @@ class APICallLogger:
         output_tokens = self._estimate_data_size(response_data)
         
         # Create simple event object
-        class SimpleEvent:
-            def __init__(self):
-                self.traceId = trace_id
-                self.type = "generation"
-                self.startTime = start_time.isoformat().replace('+00:00', 'Z')
-                self.input = {
-                    "model": "api-server"
-                }
-                self.usage = {
-                    "prompt_tokens": input_tokens,
-                    "completion_tokens": output_tokens,
-                    "total_tokens": input_tokens + output_tokens
-                }
-                self.cost = 0.0
-        
-        event = SimpleEvent()
+        event = SimpleEvent(
+            traceId=trace_id,
+            startTime=_iso_z(start_time),
+            input={"model": "api-server"},
+            usage={
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            }
+        )
         
         # Write to log file
         try:
@@ -138,6 +232,10 @@ class APICallLogger:
         except Exception as e:
             logger.error(f"Failed to write API log: {e}")
     
+    def flush(self) -> None:
+        """Write any queued API log events to disk now."""
+        self.crashlens_logger.flush()
+    
     def _estimate_data_size(self, data: Any) -> int:
         """Estimate data size in 'tokens' (characters/4)."""
         if not data:
@@ -170,19 +268,14 @@ class APILoggingMiddleware(BaseHTTPMiddleware):
                 # Clone request to read body
                 body = await request.body()
                 if body:
-                    import json
                     try:
-                        request_data = json.loads(body)
+                        request_data = orjson.loads(body)
                     except:
                         request_data = {"body": body.decode("utf-8", errors="ignore")[:500]}
             
             # Add query parameters
             if request.query_params:
-<<<<<<< HEAD
                 request_data["query_params"] = dict(request.query_params)
-=======
-                request_data.update(dict(request.query_params))
->>>>>>> 94bb2a09def6d5cf440c6b59f6eebedb12e9c613
             
         except Exception as e:
             logger.warning(f"Failed to extract request data: {e}")
@@ -195,22 +288,16 @@ class APILoggingMiddleware(BaseHTTPMiddleware):
         latency_ms = int((end_time - start_time).total_seconds() * 1000)
         
         # Create simple event object for API request
-        class SimpleEvent:
-            def __init__(self):
-                self.traceId = trace_id
-                self.type = "generation"
-                self.startTime = start_time.isoformat().replace('+00:00', 'Z')
-                self.input = {
-                    "model": "fastapi-server"
-                }
-                self.usage = {
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0
-                }
-                self.cost = 0.0
-        
-        event = SimpleEvent()
+        event = SimpleEvent(
+            traceId=trace_id,
+            startTime=_iso_z(start_time),
+            input={"model": "fastapi-server"},
+            usage={
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0
+            }
+        )
         
         try:
             self.api_logger.crashlens_logger.write_logs([event], self.api_logger.log_file_path)
@@ -251,22 +338,16 @@ class EmailAPILogger:
         output_tokens = len(predicted_category) // 4
         
         # Create simple event object with just the required fields
-        class SimpleEvent:
-            def __init__(self):
-                self.traceId = trace_id
-                self.type = "generation"
-                self.startTime = start_time.isoformat().replace('+00:00', 'Z')
-                self.input = {
-                    "model": model_used
-                }
-                self.usage = {
-                    "prompt_tokens": input_tokens,
-                    "completion_tokens": output_tokens,
-                    "total_tokens": input_tokens + output_tokens
-                }
-                self.cost = 0.0
-        
-        event = SimpleEvent()
+        event = SimpleEvent(
+            traceId=trace_id,
+            startTime=_iso_z(start_time),
+            input={"model": model_used},
+            usage={
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            }
+        )
         
         try:
             self.api_logger.crashlens_logger.write_logs([event], self.api_logger.log_file_path)
@@ -296,22 +377,16 @@ class EmailAPILogger:
         output_tokens = sum(len(bullet) for bullet in summary_bullets) // 4
         
         # Create simple event object with just the required fields
-        class SimpleEvent:
-            def __init__(self):
-                self.traceId = trace_id
-                self.type = "generation"
-                self.startTime = start_time.isoformat().replace('+00:00', 'Z')
-                self.input = {
-                    "model": model_used
-                }
-                self.usage = {
-                    "prompt_tokens": input_tokens,
-                    "completion_tokens": output_tokens,
-                    "total_tokens": input_tokens + output_tokens
-                }
-                self.cost = 0.0
-        
-        event = SimpleEvent()
+        event = SimpleEvent(
+            traceId=trace_id,
+            startTime=_iso_z(start_time),
+            input={"model": model_used},
+            usage={
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            }
+        )
         
         try:
             self.api_logger.crashlens_logger.write_logs([event], self.api_logger.log_file_path)
@@ -369,22 +444,16 @@ def call_llm(model: str, prompt: str, **kwargs) -> Dict[str, Any]:
         usage = response.get("usage", {})
         
         # Log the LLM call
-        class SimpleEvent:
-            def __init__(self):
-                self.traceId = trace_id
-                self.type = "generation"
-                self.startTime = start_time.isoformat().replace('+00:00', 'Z')
-                self.input = {
-                    "model": model
-                }
-                self.usage = {
-                    "prompt_tokens": usage.get("prompt_tokens", 0),
-                    "completion_tokens": usage.get("completion_tokens", 0),
-                    "total_tokens": usage.get("total_tokens", 0)
-                }
-                self.cost = 0.0  # Calculate based on model pricing
-        
-        event = SimpleEvent()
+        event = SimpleEvent(
+            traceId=trace_id,
+            startTime=_iso_z(start_time),
+            input={"model": model},
+            usage={
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0)
+            }
+        )
         api_logger.crashlens_logger.write_logs([event], api_logger.log_file_path)
         
         return {
@@ -25,6 +25,13 @@ class Settings(BaseSettings):
     MONGODB_EMAIL_COLLECTION_NAME: str = os.getenv("MONGODB_EMAIL_COLLECTION_NAME", "emails")
     MONGODB_USERS_COLLECTION_NAME: str = os.getenv("MONGODB_USERS_COLLECTION_NAME","users")
     MONGODB_OAUTH_COLLECTION_NAME: str = os.getenv("MONGODB_OAUTH_COLLECTION_NAME", "oauth")
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
+    MONGODB_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+    # Fail fast instead of queueing forever when every pooled connection is busy
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGODB_COMPRESSORS: str = os.getenv("MONGODB_COMPRESSORS", "zstd,zlib")
+    MONGODB_ZLIB_COMPRESSION_LEVEL: int = int(os.getenv("MONGODB_ZLIB_COMPRESSION_LEVEL", "6"))
     
     # Email Categories
     EMAIL_CATEGORIES: List[str] = [
@@ -55,6 +62,14 @@ class Settings(BaseSettings):
     # Session settings
     SESSION_SECRET_KEY: str = os.getenv("SESSION_SECRET_KEY","")  # Change this in production
     
+    # Outbound API thread pools
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "16"))
+    GMAIL_POOL_SIZE: int = int(os.getenv("GMAIL_POOL_SIZE", "16"))
+    # Max Gmail messages summarized/classified concurrently per sync
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "5"))
+    # Summaries kept in memory by body hash; 0 disables the cache
+    SUMMARY_CACHE_SIZE: int = int(os.getenv("SUMMARY_CACHE_SIZE", "1024"))
+    
     # Application settings
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     
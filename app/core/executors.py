@@ -0,0 +1,30 @@
+"""
+Dedicated thread pools for blocking outbound API calls.
+
+The Gemini (requests) and Gmail (googleapiclient) clients are synchronous.
+Running them on their own bounded pools keeps a burst of slow LLM or Gmail
+calls from blocking the event loop or starving the default executor that
+the rest of the app shares.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+LLM_POOL = ThreadPoolExecutor(max_workers=settings.LLM_POOL_SIZE, thread_name_prefix="llm")
+GMAIL_POOL = ThreadPoolExecutor(max_workers=settings.GMAIL_POOL_SIZE, thread_name_prefix="gmail")
+
+async def run_in_pool(pool: Executor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the given pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, partial(func, *args, **kwargs))
+
+def shutdown_pools() -> None:
+    """Stop accepting new work on the outbound API pools."""
+    LLM_POOL.shutdown(wait=False, cancel_futures=True)
+    GMAIL_POOL.shutdown(wait=False, cancel_futures=True)
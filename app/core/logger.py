@@ -1,12 +1,24 @@
 import logging
+import os
 import sys
 from pathlib import Path
 from typing import Any, Dict, Optional
 import json
 from datetime import datetime
 
+import zstandard
 from loguru import logger
 
+def compress_zstd(path: str) -> None:
+    """Compress a rotated log file to ``<path>.zst`` and remove the original.
+
+    Used as loguru's ``compression`` hook, so it only ever runs on files that
+    rotation has already closed; the live log stays plain text and tail-able.
+    """
+    with open(path, "rb") as src, open(f"{path}.zst", "wb") as dst:
+        zstandard.ZstdCompressor().copy_stream(src, dst)
+    os.remove(path)
+
 class InterceptHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:
         try:
@@ -29,6 +41,7 @@ def setup_logging(
     level: str = "INFO",
     retention: str = "1 week",
     rotation: str = "500 MB",
+    compression: Any = compress_zstd,
     format: str = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
 ) -> None:
     """Configure logging for the application."""
@@ -37,13 +50,15 @@ def setup_logging(
     # Remove all existing handlers
     logging.root.handlers = []
 
-    # Configure loguru
+    # Configure loguru; enqueue=True hands records to a background thread so
+    # request handlers never block on stdout or file writes
     logger.configure(
         handlers=[
             {
                 "sink": sys.stdout,
                 "level": level,
                 "format": format,
+                "enqueue": True,
             },
             {
                 "sink": log_path / "app.log",
@@ -51,6 +66,8 @@ def setup_logging(
                 "format": format,
                 "rotation": rotation,
                 "retention": retention,
+                "compression": compression,
+                "enqueue": True,
             },
         ]
     )
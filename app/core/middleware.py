@@ -44,4 +44,6 @@ def setup_middleware(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Pagination headers set by /emails; browsers hide them from the frontend otherwise
+        expose_headers=["X-Total-Count", "X-Per-Page", "X-Total-Pages", "X-Current-Page", "X-Next-Before"],
     ) 
\ No newline at end of file
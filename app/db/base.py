@@ -1,21 +1,32 @@
 # app/db/base.py
+from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from loguru import logger
 from app.core.config import settings
 from pymongo.errors import ConnectionFailure
 
 class Database:
-    client: AsyncIOMotorClient
+    client: Optional[AsyncIOMotorClient] = None
     db = None
     collections = {}
 
     @classmethod
     async def connect_db(cls):
-        """Create database connection."""
+        """Create the shared database connection; later calls reuse it."""
+        if cls.client is not None:
+            return
         try:
             cls.client = AsyncIOMotorClient(
                 settings.MONGODB_URI,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                compressors=settings.MONGODB_COMPRESSORS,
+                zlibCompressionLevel=settings.MONGODB_ZLIB_COMPRESSION_LEVEL,
                 serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=5000,
+                socketTimeoutMS=45000,
                 retryWrites=True,
                 tls=True,
                 tlsAllowInvalidCertificates=False,
@@ -35,9 +46,11 @@ class Database:
             logger.info("✅ Connected to MongoDB")
         except ConnectionFailure as e:
             logger.error(f"❌ Could not connect to MongoDB: {e}")
+            cls.client = None
             raise
         except Exception as e:
             logger.error(f"❌ Unexpected error connecting to MongoDB: {e}")
+            cls.client = None
             raise
 
     @classmethod
@@ -47,10 +60,7 @@ class Database:
             # Users collection indexes
             await cls.collections['users'].create_index("email", unique=True)
             logger.info(f"✅ Created index on {settings.MONGODB_USERS_COLLECTION_NAME}.email")
-            
-            # Emails collection indexes
-            await cls.collections['emails'].create_index("gmail_id", unique=True, sparse=True)
-            logger.info(f"✅ Created index on {settings.MONGODB_EMAIL_COLLECTION_NAME}.gmail_id")
+            # Emails collection indexes are owned by email_db.ensure_indexes()
         except Exception as e:
             logger.error(f"❌ Error creating indexes: {e}")
             raise
@@ -60,6 +70,8 @@ class Database:
         """Close database connection."""
         if cls.client:
             cls.client.close()
+            cls.client = None
+            cls.db = None
             logger.info("🛑 Closed MongoDB connection")
 
     @classmethod
@@ -1,16 +1,61 @@
 import os
-from datetime import datetime
-from typing import List, Dict, Optional, Any
-from pymongo.errors import OperationFailure, DuplicateKeyError
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Any, Set
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure, DuplicateKeyError, BulkWriteError
 from loguru import logger
 from app.db.base import db
+from app.services.classifier import normalize_category
+from app.utils.llm_utils import summarize_to_bullets_async
 from motor.motor_asyncio import AsyncIOMotorCollection
 import traceback
 
+# Max documents per insert_many call in save_emails_bulk
+BULK_INSERT_CHUNK_SIZE = 1000
+
+# Fields returned by list_email_headers
+EMAIL_HEADER_PROJECTION = {
+    "_id": 0,
+    "gmail_id": 1,
+    "gmail_url": 1,
+    "subject": 1,
+    "category": 1,
+    "sender_name": 1,
+    "sender_email": 1,
+    "timestamp": 1,
+    "is_read": 1,
+}
+
+def to_utc_iso(value: Any) -> str:
+    """
+    Normalize a datetime or ISO 8601 string to a fixed-width UTC string
+    (YYYY-MM-DDTHH:MM:SS.mmmZ), so string order in Mongo is chronological.
+    Naive values are taken to be UTC.
+    
+    Raises:
+        ValueError: If a string is not valid ISO 8601
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def _utc_now_iso() -> str:
+    """Current UTC time as an ISO 8601 string with millisecond precision."""
+    return to_utc_iso(datetime.now(timezone.utc))
+
 class MongoDBStorage:
-    def __init__(self):
-        """Initialize email database access."""
-        self._collection: Optional[AsyncIOMotorCollection] = None
+    def __init__(self, collection: Optional[AsyncIOMotorCollection] = None):
+        """
+        Initialize email database access.
+        
+        Args:
+            collection (Optional[AsyncIOMotorCollection]): Collection to use instead of the
+                app database's 'emails' collection, e.g. an in-memory fake in tests
+        """
+        self._collection: Optional[AsyncIOMotorCollection] = collection
 
     @property
     def collection(self) -> AsyncIOMotorCollection:
@@ -33,11 +78,88 @@ class MongoDBStorage:
         """Check if an email with the given Gmail ID has already been processed."""
         try:
             await self._ensure_initialized()
-            return await self.collection.find_one({"gmail_id": gmail_id}) is not None
+            # Projecting only gmail_id lets the unique index cover the query (no document fetch)
+            return await self.collection.find_one({"gmail_id": gmail_id}, {"_id": 0, "gmail_id": 1}) is not None
         except Exception as e:
             logger.error(f"❌ Error checking for existing email: {str(e)}")
             return False
 
+    async def get_classified_ids(self, gmail_ids: List[str]) -> Set[str]:
+        """
+        Return the subset of the given Gmail IDs that are already stored.
+
+        Args:
+            gmail_ids (List[str]): Gmail message IDs to look up
+
+        Returns:
+            Set[str]: IDs that already have a stored (classified) email
+        """
+        if not gmail_ids:
+            return set()
+        try:
+            await self._ensure_initialized()
+            cursor = self.collection.find({"gmail_id": {"$in": list(gmail_ids)}}, {"gmail_id": 1, "_id": 0})
+            return {doc["gmail_id"] async for doc in cursor}
+        except Exception as e:
+            logger.error(f"❌ Error checking for existing emails: {str(e)}")
+            return set()
+
+    def _validate_email(self, email_data: dict) -> bool:
+        """Check that an email has a gmail_id and a non-empty user_id, normalizing the user_id."""
+        # Ensure gmail_id is present for Gmail-sourced emails
+        if "gmail_id" not in email_data:
+            logger.error("❌ Missing gmail_id for Gmail-sourced email")
+            return False
+        # Ensure user_id is present, a string, and not empty after stripping
+        user_id = email_data.get("user_id")
+        if not isinstance(user_id, str) or not user_id.strip():
+            logger.error(f"❌ Missing or invalid user_id for email: {email_data}\nStack trace:\n{traceback.format_stack()}")
+            return False
+        email_data["user_id"] = user_id.strip()
+        return True
+
+    def _apply_defaults(self, email_data: dict, now: Optional[str] = None) -> None:
+        """
+        Fill in any Email schema fields missing from a new document.
+        
+        Args:
+            email_data (dict): Email document, updated in place
+            now (Optional[str]): ISO timestamp to use for missing timestamp/fetched_at;
+                pass one value for a whole batch to avoid formatting it per document
+        """
+        now = now or _utc_now_iso()
+        # Add timestamp if not present; otherwise store it in UTC so it sorts chronologically
+        if "timestamp" not in email_data:
+            email_data["timestamp"] = now
+        else:
+            try:
+                email_data["timestamp"] = to_utc_iso(email_data["timestamp"])
+            except (TypeError, ValueError):
+                logger.warning(f"⚠️ Unparseable timestamp {email_data['timestamp']!r} for gmail_id: {email_data.get('gmail_id')}")
+
+        # Ensure all required fields for the new Email schema
+        defaults = {
+            "thread_id": None,
+            "label_ids": [],
+            "history_id": None,
+            "category": None,
+            "summary": [],
+            "is_read": False,
+            "is_processed": False,
+            "is_sensitive": False,
+            "status": "new",
+            "fetched_at": now,
+            "sender_name": None,
+            "sender_email": None,
+        }
+        for field, value in defaults.items():
+            if field not in email_data:
+                email_data[field] = value
+
+        # Lowercased copy of the category so filters can use an index
+        if isinstance(email_data["category"], str):
+            email_data["category_norm"] = normalize_category(email_data["category"])
+
     async def save_email(self, email_data: dict, force_regenerate_summary: bool = False) -> bool:
         """
         Save an email to MongoDB if it doesn't already exist.
@@ -53,66 +175,78 @@ class MongoDBStorage:
         """
         try:
             await self._ensure_initialized()
-            # Ensure gmail_id is present for Gmail-sourced emails
-            if "gmail_id" not in email_data:
-                logger.error("❌ Missing gmail_id for Gmail-sourced email")
-                return False
-            # Ensure user_id is present, a string, and not empty after stripping
-            user_id = email_data.get("user_id")
-            if not isinstance(user_id, str) or not user_id.strip():
-                logger.error(f"❌ Missing or invalid user_id for email: {email_data}\nStack trace:\n{traceback.format_stack()}")
-                return False
-            email_data["user_id"] = user_id.strip()
-
-            # Check if email with same Gmail ID already exists (duplicate check is ONLY on gmail_id)
-            existing = await self.collection.find_one({"gmail_id": email_data["gmail_id"]})
-            if existing:
-                logger.warning(f"⚠️ Duplicate email found with gmail_id: {email_data['gmail_id']} (subject: {email_data.get('subject', 'Unknown')})")
-                # If force_regenerate_summary is True, update the summary
-                if force_regenerate_summary and "body" in email_data:
-                    from app.utils.llm_utils import summarize_to_bullets
-                    new_summary = summarize_to_bullets(email_data["body"])
-                    await self.collection.update_one(
-                        {"gmail_id": email_data["gmail_id"]},
-                        {"$set": {"summary": new_summary}}
-                    )
-                    return True
+            if not self._validate_email(email_data):
                 return False
 
-            # Add timestamp if not present
-            if "timestamp" not in email_data:
-                email_data["timestamp"] = datetime.utcnow().isoformat()
-
-            # Ensure all required fields for the new Email schema
-            defaults = {
-                "thread_id": None,
-                "label_ids": [],
-                "history_id": None,
-                "category": None,
-                "summary": [],
-                "is_read": False,
-                "is_processed": False,
-                "is_sensitive": False,
-                "status": "new",
-                "fetched_at": datetime.utcnow().isoformat(),
-                "sender_name": None,
-                "sender_email": None,
-            }
-            for field, value in defaults.items():
-                if field not in email_data:
-                    email_data[field] = value
-
-            # Insert the email
+            self._apply_defaults(email_data)
+
+            # Insert directly; the unique gmail_id index rejects duplicates,
+            # so no find_one round trip is needed beforehand
             await self.collection.insert_one(email_data)
             return True
 
         except DuplicateKeyError:
-            logger.warning(f"⚠️ Duplicate email found: {email_data.get('subject', 'Unknown')} from {email_data.get('sender_name', 'Unknown')} <{email_data.get('sender_email', 'Unknown')}>")
+            logger.warning(f"⚠️ Duplicate email found with gmail_id: {email_data['gmail_id']} (subject: {email_data.get('subject', 'Unknown')})")
+            # If force_regenerate_summary is True, update the summary
+            if force_regenerate_summary and "body" in email_data:
+                try:
+                    new_summary = await summarize_to_bullets_async(email_data["body"], use_cache=False)
+                    result = await self.collection.update_one(
+                        {"gmail_id": email_data["gmail_id"], "user_id": email_data["user_id"]},
+                        {"$set": {"summary": new_summary}}
+                    )
+                    return result.matched_count > 0
+                except Exception as e:
+                    logger.error(f"❌ Error regenerating summary: {str(e)}")
             return False
         except Exception as e:
             logger.error(f"❌ Error saving email: {str(e)}")
             return False
 
+    async def save_emails_bulk(self, emails: List[dict]) -> List[dict]:
+        """
+        Save several new emails with a single unordered insert_many.
+        Duplicates are rejected by the unique gmail_id index and skipped
+        without aborting the rest of the batch.
+        
+        Args:
+            emails (List[dict]): Email documents, each with gmail_id and user_id
+            
+        Returns:
+            List[dict]: The documents that were actually inserted
+        """
+        docs = [email for email in emails if self._validate_email(email)]
+        if not docs:
+            return []
+        now = _utc_now_iso()
+        for doc in docs:
+            self._apply_defaults(doc, now)
+
+        try:
+            await self._ensure_initialized()
+        except Exception as e:
+            logger.error(f"❌ Error bulk saving emails: {str(e)}")
+            return []
+
+        saved = []
+        # Chunk the insert so a large backfill stays under the 16 MB batch limit
+        for start in range(0, len(docs), BULK_INSERT_CHUNK_SIZE):
+            chunk = docs[start:start + BULK_INSERT_CHUNK_SIZE]
+            try:
+                await self.collection.insert_many(chunk, ordered=False)
+                saved.extend(chunk)
+            except BulkWriteError as e:
+                failed = {err["index"] for err in e.details.get("writeErrors", [])}
+                duplicates = sum(1 for err in e.details.get("writeErrors", []) if err.get("code") == 11000)
+                if duplicates:
+                    logger.warning(f"⚠️ Skipped {duplicates} duplicate emails in bulk insert")
+                if len(failed) > duplicates:
+                    logger.error(f"❌ {len(failed) - duplicates} emails failed in bulk insert")
+                saved.extend(doc for i, doc in enumerate(chunk) if i not in failed)
+            except Exception as e:
+                logger.error(f"❌ Error bulk saving emails: {str(e)}")
+        return saved
+
     async def load_emails(self) -> List[Dict]:
         """
         Load emails from MongoDB, excluding _id field.
@@ -135,6 +269,30 @@ class MongoDBStorage:
             logger.error(f"❌ Unexpected error loading emails: {str(e)}")
             return []
 
+    async def list_email_headers(self, user_id: str, limit: int = 50, category: Optional[str] = None) -> List[Dict]:
+        """
+        List a user's emails newest first with only the fields a list view needs.
+        The body and summary stay on the server; fetch them per email for detail views.
+        
+        Args:
+            user_id (str): Clerk user ID
+            limit (int): Maximum number of emails to return
+            category (Optional[str]): Only return emails in this category (case-insensitive)
+            
+        Returns:
+            List[Dict]: Email headers (gmail_id, subject, category, sender, timestamp, read state)
+        """
+        try:
+            await self._ensure_initialized()
+            query = {"user_id": user_id}
+            if category is not None:
+                query["category_norm"] = normalize_category(category)
+            cursor = self.collection.find(query, EMAIL_HEADER_PROJECTION).sort('timestamp', -1).limit(limit)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            logger.error(f"❌ Error listing email headers: {str(e)}")
+            return []
+
     async def get_email_by_subject(self, subject: str) -> Optional[Dict]:
         """
         Get a single email by its subject.
@@ -228,34 +386,23 @@ class MongoDBStorage:
         """
         try:
             await self._ensure_initialized()
-            from utils.llm_utils import summarize_to_bullets
-            
-            # Find emails without summaries or with empty summaries
-            query = {
-                "$or": [
-                    {"summary": {"$exists": False}},
-                    {"summary": []},
-                    {"summary": [""]},
-                    {"summary": {"$size": 0}}
-                ]
-            }
+            # Find emails without summaries or with empty summaries; null also
+            # matches a missing field, so one $in replaces the old $or branches
+            query = {"summary": {"$in": [None, [], [""]]}}
             
             # Get batch of emails
-            cursor = self.collection.find(query).limit(batch_size)
-            emails = await cursor.to_list(length=None)
-            updated_count = 0
+            cursor = self.collection.find(query, {"_id": 1, "body": 1}).limit(batch_size)
+            emails = [email for email in await cursor.to_list(length=batch_size) if "body" in email]
+            if not emails:
+                return 0
             
-            for email in emails:
-                if "body" in email:
-                    # Generate new summary
-                    new_summary = summarize_to_bullets(email["body"])
-                    
-                    # Update the email
-                    await self.collection.update_one(
-                        {"_id": email["_id"]},
-                        {"$set": {"summary": new_summary}}
-                    )
-                    updated_count += 1
+            # Generate the batch's summaries concurrently, then write them in one round trip
+            summaries = await asyncio.gather(*(summarize_to_bullets_async(email["body"]) for email in emails))
+            result = await self.collection.bulk_write([
+                UpdateOne({"_id": email["_id"]}, {"$set": {"summary": summary}})
+                for email, summary in zip(emails, summaries)
+            ], ordered=False)
+            updated_count = result.modified_count
                     
             return updated_count
             
@@ -288,6 +435,11 @@ class MongoDBStorage:
         await self._ensure_initialized()
         await self.collection.create_index("gmail_id", unique=True, sparse=True)
         await self.collection.create_index("thread_id", sparse=True)
+        # gmail_id breaks timestamp ties for the /emails keyset cursor
+        await self.collection.create_index([("user_id", 1), ("timestamp", -1), ("gmail_id", -1)])
+        await self.collection.create_index([("user_id", 1), ("category_norm", 1), ("timestamp", -1), ("gmail_id", -1)])
+        # Equality on user and exact category, then sort: serves /by-categories
+        await self.collection.create_index([("user_id", 1), ("category", 1), ("timestamp", -1)])
 
 # Create a singleton instance
 # email_db = MongoDBStorage()  # Removed - instance is created in __init__.py 
\ No newline at end of file
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.openapi.models import SecurityScheme
 from loguru import logger
 from app.db.base import db
@@ -12,6 +13,8 @@ from app.routers.auth_callback import router as auth_callback_router
 from app.routers.oauth_callback import router as oauth_callback_router
 from app.core.clerk import clerk_auth
 from app.core.config import settings
+from app.core.executors import shutdown_pools
+from app.utils.llm_utils import close_http_client
 
 # Setup logging
 setup_logging()
@@ -21,6 +24,7 @@ app = FastAPI(
     title="AI Email Categorizer",
     description="API for categorizing emails using AI",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 logger.info("FastAPI application created")
 
@@ -34,11 +38,7 @@ logger.info("API logging middleware added")
 
 # Include routers with Clerk authentication
 app.include_router(email_routes.router, prefix="/routers/v1", dependencies=[Depends(clerk_auth)])
-<<<<<<< HEAD
 app.include_router(classify_routes.router, prefix="/routers/v1")  # Authentication removed
-=======
-app.include_router(classify_routes.router, prefix="/routers/v1")
->>>>>>> 94bb2a09def6d5cf440c6b59f6eebedb12e9c613
 app.include_router(auth_routes, prefix="/routers/v1", dependencies=[Depends(clerk_auth)])
 app.include_router(health_routes.router, prefix="/routers/v1")  # Health check doesn't need auth
 app.include_router(clerk_webhook)
@@ -78,11 +78,19 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Could not clean up expired OAuth states: {e}")
     
+    logger.info(
+        f"Outbound API pools: llm={settings.LLM_POOL_SIZE} workers, "
+        f"gmail={settings.GMAIL_POOL_SIZE} workers"
+    )
     logger.info("Application startup complete")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutdown initiated")
+    shutdown_pools()
+    await close_http_client()
+    await db.close_db()
+    api_logger.crashlens_logger.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -94,6 +94,29 @@ class EmailRequest(BaseModel):
             }
         }
 
+class EmailHeader(BaseModel):
+    gmail_id: str = Field(..., description="Unique Gmail message ID")
+    gmail_url: Optional[str] = Field(None, description="Direct link to view email in Gmail")
+    subject: str = Field(..., description="Email subject")
+    category: Optional[str] = Field(None, description="AI-generated category")
+    sender_name: Optional[str] = Field(None, description="Sender's display name")
+    sender_email: Optional[str] = Field(None, description="Sender's email address")
+    timestamp: datetime = Field(..., description="Timestamp when email was received")
+    is_read: bool = Field(default=False, description="If email was read by user")
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "gmail_id": "1853d239248aee99",
+                "gmail_url": "https://mail.google.com/mail/u/0/#inbox/1853d239248aee99",
+                "subject": "Interview Invitation",
+                "category": "Job Offer",
+                "sender_name": "John Doe",
+                "sender_email": "hr@openai.com",
+                "timestamp": "2025-06-16T12:00:00Z",
+                "is_read": False
+            }
+        }
+
 class ClassifiedEmail(BaseModel):
     gmail_id: Optional[str] = Field(None, description="Gmail message ID")
     gmail_url: Optional[str] = Field(None, description="Direct link to view email in Gmail")
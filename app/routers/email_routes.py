@@ -1,42 +1,116 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
-from typing import List, Optional, Dict
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends, Request, Response
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 from loguru import logger
+import asyncio
+import hashlib
+import orjson
 import time
 
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
-
-from app.models.email import Email, EmailRequest, EmailIdentifier, ClassifiedEmail, EmailRecategorizeRequest, EmailRecategorizeResponse
+from app.models.email import Email, EmailHeader, EmailRequest, EmailIdentifier, ClassifiedEmail, EmailRecategorizeRequest, EmailRecategorizeResponse
 from app.db import email_db
 from app.services.gmail_client import get_latest_emails
-from app.utils.llm_utils import summarize_to_bullets
-from app.services.classifier import classify_email
+from app.utils.llm_utils import summarize_to_bullets_async
+from app.services.classifier import classify_email, normalize_category
 from app.core.clerk import clerk_auth
+from app.core.config import settings
+from app.core.executors import LLM_POOL, run_in_pool
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
-def normalize_category(category: str) -> str:
-    """Normalize category string by converting to lowercase and stripping whitespace."""
-    return category.lower().strip()
+# Emails classified and written per round of /recategorize/bulk
+RECATEGORIZE_CHUNK_SIZE = 50
+
+def _search_filter(q: str) -> Dict:
+    """
+    Build the Mongo filter for a free-text search over subject, body and sender.
+    
+    Raises:
+        HTTPException: 400 if the trimmed query is shorter than 2 or longer than 100 characters
+    """
+    q = q.strip()
+    if len(q) < 2:
+        raise HTTPException(
+            status_code=400,
+            detail="Search query must be at least 2 characters long"
+        )
+    if len(q) > 100:
+        raise HTTPException(
+            status_code=400,
+            detail="Search query cannot exceed 100 characters"
+        )
+    return {"$or": [
+        {"subject": {"$regex": q, "$options": "i"}},
+        {"body": {"$regex": q, "$options": "i"}},
+        {"sender_name": {"$regex": q, "$options": "i"}},
+        {"sender_email": {"$regex": q, "$options": "i"}}
+    ]}
+
+# Newest first; gmail_id breaks ties between emails with the same timestamp
+EMAIL_CURSOR_SORT = [("timestamp", -1), ("gmail_id", -1)]
+
+def _before_filter(before: str) -> Dict:
+    """
+    Build the Mongo filter for emails after a "<timestamp>|<gmail_id>" cursor in EMAIL_CURSOR_SORT order.
+    
+    Raises:
+        HTTPException: 400 if the cursor is missing either part
+    """
+    timestamp, _, gmail_id = before.rpartition("|")
+    if not timestamp or not gmail_id:
+        raise HTTPException(
+            status_code=400,
+            detail="before must be the X-Next-Before value from a previous page"
+        )
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "gmail_id": {"$lt": gmail_id}}
+    ]}
+
+def _fill_email_defaults(email: Dict) -> None:
+    """Fill in fields that older stored emails may be missing before building an Email."""
+    if 'sender_name' not in email:
+        email['sender_name'] = None
+    if 'sender_email' not in email or not email['sender_email']:
+        email['sender_email'] = email.get('from', '')
+        logger.debug(f"Using 'from' field as sender_email for email: {email.get('subject', 'No subject')}")
+    if 'timestamp' not in email:
+        email['timestamp'] = datetime.utcnow().isoformat()
+        logger.warning(f"⚠️ Missing timestamp for {email.get('subject', 'No subject')}, set to: {email['timestamp']}")
+    if 'summary' not in email:
+        email['summary'] = []
+        logger.debug(f"Added empty summary for email: {email.get('subject', 'No subject')}")
+    # Ensure gmail_url is present
+    if 'gmail_url' not in email and 'gmail_id' in email:
+        email['gmail_url'] = f"https://mail.google.com/mail/u/0/#inbox/{email['gmail_id']}"
+        logger.debug(f"Generated gmail_url for email: {email.get('subject', 'No subject')}")
 
 # API Endpoints
 @router.get("/emails", response_model=List[Email])
 async def get_emails(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
     q: Optional[str] = Query(None, min_length=2, max_length=100, description="Search in subject, body, sender_name, and sender_email"),
+    before: Optional[str] = Query(None, description="Cursor from the X-Next-Before header: return emails after it (keyset pagination, overrides page)"),
     user=Depends(clerk_auth)
 ):
     """
     Get all emails with pagination, search, and filtering.
-    Results are sorted by timestamp (newest first).
+    Results are sorted by timestamp (newest first). Only the requested page is
+    read from Mongo; totals are returned in the X-Total-* headers.
     
     Args:
         category: Filter by category (case-insensitive)
         page: Page number (starts at 1)
         limit: Items per page (max 100)
         q: Search query for subject/body/sender_name/sender_email (2-100 chars)
+        before: "<timestamp>|<gmail_id>" cursor from the previous page's X-Next-Before
+            header; walks the (timestamp, gmail_id) index instead of skipping over earlier pages
     """
     total_start = time.time()
     try:
@@ -45,28 +119,12 @@ async def get_emails(
         # Initialize query with user_id filter
         query = {"user_id": clerk_user_id}
         if category is not None:
-            query["category"] = {"$regex": f"^{category}$", "$options": "i"}
+            query["category_norm"] = normalize_category(category)
         
         # Validate search query if provided
         if q:
-            q = q.strip()
-            if len(q) < 2:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Search query must be at least 2 characters long"
-                )
-            if len(q) > 100:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Search query cannot exceed 100 characters"
-                )
             # Search in subject, body, sender_name, and sender_email
-            query["$or"] = [
-                {"subject": {"$regex": q, "$options": "i"}},
-                {"body": {"$regex": q, "$options": "i"}},
-                {"sender_name": {"$regex": q, "$options": "i"}},
-                {"sender_email": {"$regex": q, "$options": "i"}}
-            ]
+            query.update(_search_filter(q))
             logger.info(f"Using search query: {q}")
         
         # Validate pagination parameters
@@ -84,60 +142,57 @@ async def get_emails(
         logger.info(f"📧 GET /emails - Retrieving emails with filters:")
         logger.info(f"Category: {category}, Page: {page}, Limit: {limit}, Search: {q}")
         
-        # Calculate skip value for pagination
+        # Range-based pagination when a cursor is given, otherwise skip pages
+        page_query = query
         skip = (page - 1) * limit
+        if before:
+            page_query = {"$and": [query, _before_filter(before)]}
+            skip = 0
         
-        # Get total count for pagination info
-        total = await email_db.collection.count_documents(query)
+        # Count and fetch the requested page concurrently
+        mongo_start = time.time()
+        cursor = email_db.collection.find(
+            page_query,
+            {'_id': 0}
+        ).sort(EMAIL_CURSOR_SORT).skip(skip).limit(limit)
+        total, emails = await asyncio.gather(
+            email_db.collection.count_documents(query),
+            cursor.to_list(length=limit)
+        )
+        logger.debug(f"Mongo fetch took {time.time() - mongo_start:.3f}s")
         
         # Validate if requested page exists
         total_pages = (total + limit - 1) // limit
-        if page > total_pages and total > 0:
+        if not before and page > total_pages and total > 0:
             raise HTTPException(
                 status_code=404,
                 detail=f"Page {page} does not exist. Total pages: {total_pages}"
             )
         
-        # Get paginated results
-        mongo_start = time.time()
-        cursor = email_db.collection.find(
-            query,
-            {'_id': 0}
-        ).sort('timestamp', -1).skip(skip).limit(limit)
-        emails = await cursor.to_list(length=None)
-        print("Mongo fetch took", time.time() - mongo_start)
-        
         logger.info(f"Total emails found: {len(emails)}")
         
         # Ensure all emails have required fields
         for email in emails:
-            if 'sender_name' not in email:
-                email['sender_name'] = None
-            if 'sender_email' not in email or not email['sender_email']:
-                email['sender_email'] = email.get('from', '')
-                logger.debug(f"Using 'from' field as sender_email for email: {email.get('subject', 'No subject')}")
-            if 'timestamp' not in email:
-                email['timestamp'] = datetime.utcnow().isoformat()
-                logger.warning(f"⚠️ Missing timestamp for {email.get('subject', 'No subject')}, set to: {email['timestamp']}")
-            if 'summary' not in email:
-                email['summary'] = []
-                logger.debug(f"Added empty summary for email: {email.get('subject', 'No subject')}")
-            # Ensure gmail_url is present
-            if 'gmail_url' not in email and 'gmail_id' in email:
-                email['gmail_url'] = f"https://mail.google.com/mail/u/0/#inbox/{email['gmail_id']}"
-                logger.debug(f"Generated gmail_url for email: {email.get('subject', 'No subject')}")
-        
-        # Add pagination info to response headers
-        headers = {
+            _fill_email_defaults(email)
+        
+        # Add pagination info to response headers; page numbers mean nothing in cursor mode
+        response.headers.update({
             "X-Total-Count": str(total),
-            "X-Total-Pages": str(total_pages),
-            "X-Current-Page": str(page),
             "X-Per-Page": str(limit)
-        }
-        
-        logger.info(f"✅ Retrieved {len(emails)} emails (page {page} of {total_pages})")
-        print("Total API duration:", time.time() - total_start)
-        return [Email(**email) for email in emails]
+        })
+        if not before:
+            response.headers.update({
+                "X-Total-Pages": str(total_pages),
+                "X-Current-Page": str(page)
+            })
+        if len(emails) == limit:
+            response.headers["X-Next-Before"] = f"{emails[-1]['timestamp']}|{emails[-1]['gmail_id']}"
+        
+        logger.info(f"✅ Retrieved {len(emails)} emails" + ("" if before else f" (page {page} of {total_pages})"))
+        logger.debug(f"Total API duration: {time.time() - total_start:.3f}s")
+        # response_model validates and serializes the dicts once; building
+        # Email objects here would validate every document twice
+        return emails
         
     except HTTPException as e:
         # Re-raise HTTP exceptions
@@ -149,13 +204,68 @@ async def get_emails(
             detail=f"Failed to retrieve emails: {str(e)}"
         )
 
+# Seconds a /categories result is served before distinct() runs again; matches its max-age
+CATEGORIES_TTL_SECONDS = 60
+
+# Last /categories payload: (monotonic time it was fetched, JSON body, ETag)
+_categories_payload: Optional[Tuple[float, bytes, str]] = None
+
+async def _get_categories_payload() -> Tuple[bytes, str]:
+    """Return the JSON body and ETag for the category list, running distinct() at most once per TTL."""
+    global _categories_payload
+    now = time.monotonic()
+    if _categories_payload is None or now - _categories_payload[0] >= CATEGORIES_TTL_SECONDS:
+        categories = await email_db.get_all_categories()
+        content = orjson.dumps(categories)
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        _categories_payload = (now, content, etag)
+    return _categories_payload[1], _categories_payload[2]
+
+def _invalidate_categories_payload() -> None:
+    """Drop the cached /categories payload so the next request sees a recategorized email's category."""
+    global _categories_payload
+    _categories_payload = None
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (a list of ETags or '*') against an ETag."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+@router.get("/headers", response_model=List[EmailHeader])
+async def get_email_headers(
+    category: Optional[str] = Query(None, description="Filter by category"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of emails"),
+    user=Depends(clerk_auth)
+):
+    """
+    Get the newest emails for a list view without their bodies or summaries.
+    Use /emails when the full documents are needed.
+    
+    Args:
+        category: Filter by category (case-insensitive)
+        limit: Maximum number of emails (max 100)
+    """
+    clerk_user_id = user.get("clerk_user_id") or user.get("sub")
+    return await email_db.list_email_headers(clerk_user_id, limit, category)
+
 @router.get("/categories", response_model=List[str])
-async def get_categories():
+async def get_categories(request: Request):
     """
     Get the list of all available email categories.
     Categories are returned in their original case.
+    The list is cached for CATEGORIES_TTL_SECONDS, and the response is
+    304 Not Modified when the client's If-None-Match matches its ETag.
     """
-    return await email_db.get_all_categories()
+    content, etag = await _get_categories_payload()
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={CATEGORIES_TTL_SECONDS}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 @router.post("/emails/{gmail_id}/re_summary")
 async def generate_new_email_summary(gmail_id: str):
@@ -178,7 +288,7 @@ async def generate_new_email_summary(gmail_id: str):
             )
             
         # Generate new summary
-        new_summary = summarize_to_bullets(email["body"])
+        new_summary = await summarize_to_bullets_async(email["body"], use_cache=False)
         logger.info(f"Generated summary with {len(new_summary)} bullet points for Gmail ID: {gmail_id}")
         
         # Update the email with new summary
@@ -230,6 +340,9 @@ async def get_emails_by_categories(
             
         logger.info(f"📧 GET /by-categories - Retrieving emails for {len(categories)} categories")
         
+        # Build the search filter once for every category
+        search = _search_filter(q) if q else {}
+        
         # Initialize result dictionary
         result = {}
         
@@ -240,60 +353,20 @@ async def get_emails_by_categories(
         for category in categories:
             try:
                 # Build query with user_id filter
-                query = {"user_id": clerk_user_id, "category": category}
-                
-                # Add search query if provided
-                if q:
-                    q = q.strip()
-                    if len(q) < 2:
-                        raise HTTPException(
-                            status_code=400,
-                            detail="Search query must be at least 2 characters long"
-                        )
-                    if len(q) > 100:
-                        raise HTTPException(
-                            status_code=400,
-                            detail="Search query cannot exceed 100 characters"
-                        )
-                    query["$or"] = [
-                        {"subject": {"$regex": q, "$options": "i"}},
-                        {"body": {"$regex": q, "$options": "i"}},
-                        {"sender_name": {"$regex": q, "$options": "i"}},
-                        {"sender_email": {"$regex": q, "$options": "i"}}
-                    ]
-                
-                # Get total count for this category
-                total = await email_db.collection.count_documents(query)
+                query = {"user_id": clerk_user_id, "category": category, **search}
                 
-                # Validate if requested page exists
-                total_pages = (total + limit - 1) // limit
-                if page > total_pages and total > 0:
-                    logger.warning(f"Page {page} does not exist for category {category}. Total pages: {total_pages}")
-                    result[category] = []
-                    continue
-                
-                # Get paginated results for this category
+                # Get paginated results for this category; a page past the end
+                # simply comes back empty, so no separate count is needed
                 cursor = email_db.collection.find(
                     query,
                     {'_id': 0}
                 ).sort('timestamp', -1).skip(skip).limit(limit)
                 
-                emails = await cursor.to_list(length=None)
+                emails = await cursor.to_list(length=limit)
                 
                 # Ensure all emails have required fields
                 for email in emails:
-                    if 'sender_name' not in email:
-                        email['sender_name'] = None
-                    if 'sender_email' not in email or not email['sender_email']:
-                        email['sender_email'] = email.get('from', '')
-                    if 'timestamp' not in email:
-                        email['timestamp'] = datetime.utcnow().isoformat()
-                    if 'summary' not in email:
-                        email['summary'] = []
-                    # Ensure gmail_url is present
-                    if 'gmail_url' not in email and 'gmail_id' in email:
-                        email['gmail_url'] = f"https://mail.google.com/mail/u/0/#inbox/{email['gmail_id']}"
-                        logger.debug(f"Generated gmail_url for email: {email.get('subject', 'No subject')}")
+                    _fill_email_defaults(email)
                 
                 result[category] = [Email(**email) for email in emails]
                 logger.info(f"Retrieved {len(emails)} emails for category: {category}")
@@ -305,6 +378,8 @@ async def get_emails_by_categories(
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to retrieve emails by categories: {str(e)}")
         raise HTTPException(
@@ -356,12 +431,13 @@ async def recategorize_email(
             logger.info(f"Using provided category: {new_category}")
         else:
             # Re-classify using AI
-            new_category = classify_email(email["subject"], email["body"])
+            new_category = await run_in_pool(LLM_POOL, classify_email, email["subject"], email["body"])
             logger.info(f"AI re-classified email as: {new_category}")
         
         # Prepare update data
         update_data = {
             "category": new_category,
+            "category_norm": normalize_category(new_category),
             "is_processed": True
         }
         
@@ -369,7 +445,7 @@ async def recategorize_email(
         new_summary = None
         if request.regenerate_summary:
             logger.info("Regenerating email summary...")
-            new_summary = summarize_to_bullets(email["body"])
+            new_summary = await summarize_to_bullets_async(email["body"], use_cache=False)
             update_data["summary"] = new_summary
             logger.info(f"Generated new summary with {len(new_summary)} bullet points")
         
@@ -385,6 +461,7 @@ async def recategorize_email(
                 status_code=500,
                 detail="Failed to update email category"
             )
+        _invalidate_categories_payload()
         
         logger.success(f"✅ Successfully recategorized email {request.gmail_id}: {old_category} → {new_category}")
         
@@ -429,12 +506,65 @@ async def bulk_recategorize_emails(
         # Build query
         query = {"user_id": clerk_user_id}
         if category:
-            query["category"] = {"$regex": f"^{category}$", "$options": "i"}
+            query["category_norm"] = normalize_category(category)
             logger.info(f"Filtering by category: {category}")
         
-        # Get emails to recategorize
-        emails = await email_db.collection.find(query).to_list(length=None)
-        total_emails = len(emails)
+        # Classify up to LLM_MAX_CONCURRENCY emails at once instead of one after another
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        
+        async def recategorize(email: Dict) -> Optional[UpdateOne]:
+            async with semaphore:
+                try:
+                    # Re-classify the email
+                    old_category = email.get("category")
+                    new_category = await run_in_pool(LLM_POOL, classify_email, email["subject"], email["body"])
+                    
+                    update_data = {
+                        "category": new_category,
+                        "category_norm": normalize_category(new_category),
+                        "is_processed": True
+                    }
+                    
+                    # Regenerate summary if requested
+                    if regenerate_summary:
+                        new_summary = await summarize_to_bullets_async(email["body"], use_cache=False)
+                        update_data["summary"] = new_summary
+                    
+                    logger.debug(f"Recategorized {email['gmail_id']}: {old_category} → {new_category}")
+                    return UpdateOne(
+                        {"gmail_id": email["gmail_id"], "user_id": clerk_user_id},
+                        {"$set": update_data}
+                    )
+                except Exception as e:
+                    logger.error(f"Error processing email {email.get('gmail_id')}: {str(e)}")
+                    return None
+        
+        # Get emails to recategorize; only the fields the classifier needs
+        cursor = email_db.collection.find(
+            query, {"_id": 0, "gmail_id": 1, "subject": 1, "body": 1, "category": 1}
+        )
+        
+        # Classify and write one chunk at a time, so finished work is persisted
+        # even if a later chunk fails or the client disconnects
+        total_emails = 0
+        successful = 0
+        while emails := await cursor.to_list(length=RECATEGORIZE_CHUNK_SIZE):
+            total_emails += len(emails)
+            results = await asyncio.gather(*(recategorize(email) for email in emails))
+            updates = [update for update in results if update is not None]
+            if not updates:
+                continue
+            try:
+                result = await email_db.collection.bulk_write(updates, ordered=False)
+                modified = result.modified_count
+            except BulkWriteError as e:
+                modified = e.details.get("nModified", 0)
+                logger.error(f"❌ {len(e.details.get('writeErrors', []))} recategorized emails failed to write")
+            if modified < len(updates):
+                logger.warning(f"{len(updates) - modified} recategorized emails were not updated")
+            if modified:
+                _invalidate_categories_payload()
+            successful += modified
         
         if total_emails == 0:
             return {
@@ -443,45 +573,7 @@ async def bulk_recategorize_emails(
                 "successful": 0,
                 "failed": 0
             }
-        
-        logger.info(f"Found {total_emails} emails to recategorize")
-        
-        successful = 0
-        failed = 0
-        
-        for email in emails:
-            try:
-                # Re-classify the email
-                old_category = email.get("category")
-                new_category = classify_email(email["subject"], email["body"])
-                
-                update_data = {
-                    "category": new_category,
-                    "is_processed": True
-                }
-                
-                # Regenerate summary if requested
-                if regenerate_summary:
-                    new_summary = summarize_to_bullets(email["body"])
-                    update_data["summary"] = new_summary
-                
-                # Update the email
-                result = await email_db.collection.update_one(
-                    {"gmail_id": email["gmail_id"], "user_id": clerk_user_id},
-                    {"$set": update_data}
-                )
-                
-                if result.modified_count > 0:
-                    successful += 1
-                    logger.debug(f"Recategorized {email['gmail_id']}: {old_category} → {new_category}")
-                else:
-                    failed += 1
-                    logger.warning(f"Failed to update email: {email['gmail_id']}")
-                    
-            except Exception as e:
-                failed += 1
-                logger.error(f"Error processing email {email.get('gmail_id')}: {str(e)}")
-                continue
+        failed = total_emails - successful
         
         logger.success(f"✅ Bulk recategorization complete: {successful} successful, {failed} failed")
         
@@ -2,8 +2,8 @@ from fastapi import APIRouter, HTTPException
 from loguru import logger
 from datetime import datetime
 import httpx
-from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.db.base import db as database
 from app.services.gmail_client import get_gmail_service_for_user
 
 router = APIRouter(tags=["health"])
@@ -11,13 +11,14 @@ router = APIRouter(tags=["health"])
 async def check_mongodb():
     """Check MongoDB connection and get basic stats."""
     try:
-        client = AsyncIOMotorClient(settings.MONGODB_URI)
+        # Reuse the app's pooled client instead of opening a new connection per check
+        if database.client is None:
+            raise ConnectionError("MongoDB is not connected.")
         # Ping the server
-        await client.admin.command('ping')
+        await database.client.admin.command('ping')
         
         # Get database stats
-        db = client[settings.MONGODB_DB_NAME]
-        stats = await db.command("dbStats")
+        stats = await database.db.command("dbStats")
         
         return {
             "status": "healthy",
@@ -4,6 +4,7 @@ import logging
 from app.services.email_ingestion import fetch_and_process_new_emails
 from app.db.base import db, get_user_history_id, set_user_history_id
 from app.services.gmail_client import get_incremental_emails, handle_history_id_too_old
+from app.core.executors import GMAIL_POOL, run_in_pool
 import base64
 import json
 
@@ -80,7 +81,7 @@ async def gmail_push_webhook(request: Request):
     processed_count = 0
     if webhook_history_id:
         try:
-            from app.services.gmail_client import get_gmail_service_for_user, process_and_save_gmail_message
+            from app.services.gmail_client import get_gmail_service_for_user, fetch_unprocessed_messages, build_emails_from_gmail_messages, save_processed_emails
             service = await get_gmail_service_for_user(user_id)
             
             # Get user's last known historyId
@@ -90,12 +91,12 @@ async def gmail_push_webhook(request: Request):
             if last_history_id:
                 # Use the user's last historyId to get changes since last sync
                 logging.info(f"[Webhook] Fetching history since {last_history_id}")
-                history_response = service.users().history().list(
+                history_response = await run_in_pool(GMAIL_POOL, service.users().history().list(
                     userId='me',
                     startHistoryId=last_history_id,
                     historyTypes=['messageAdded'],
                     maxResults=10
-                ).execute()
+                ).execute)
                 
                 logging.info(f"[Webhook] History response: {history_response}")
                 
@@ -122,22 +123,20 @@ async def gmail_push_webhook(request: Request):
                             message_ids.append(msg['message']['id'])
                     logging.info(f"[Webhook] Message IDs to process: {message_ids}")
                     
-                    for msg_id in message_ids:
-                        try:
-                            msg = service.users().messages().get(
-                                userId='me',
-                                id=msg_id,
-                                format='full'
-                            ).execute()
-                            # Process and save the email using the reusable function
-                            processed = await process_and_save_gmail_message(msg, user_id)
-                            if processed:
-                                processed_count += 1
-                                logging.info(f"[Webhook] Successfully processed email: {processed.get('subject', 'No Subject')} (ID: {msg_id})")
-                            else:
-                                logging.info(f"[Webhook] Email already processed or failed: {msg_id}")
-                        except Exception as e:
-                            logging.error(f"[Webhook] Error processing message {msg_id}: {e}")
+                    # Only download messages that haven't been classified yet
+                    msgs = await fetch_unprocessed_messages(service, message_ids)
+                    
+                    # Summarize and classify the fetched messages concurrently
+                    email_docs = await build_emails_from_gmail_messages(msgs, user_id)
+                    skipped = len(msgs) - len(email_docs)
+                    if skipped:
+                        logging.info(f"[Webhook] {skipped} email(s) already processed or failed")
+                    
+                    # Save all processed emails in a single bulk insert
+                    saved = await save_processed_emails(email_docs)
+                    processed_count += len(saved)
+                    for email in saved:
+                        logging.info(f"[Webhook] Successfully processed email: {email.get('subject', 'No Subject')} (ID: {email.get('gmail_id')})")
                     
                     # Update to current historyId for future requests
                     if current_history_id:
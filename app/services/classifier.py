@@ -1,11 +1,67 @@
 import os
 import time
 import requests
+from functools import lru_cache
 from dotenv import load_dotenv
 from app.core.api_logging import email_logger
+from app.utils.llm_utils import GEMINI_TIMEOUT_SECONDS, get_sync_session
 
-# Load environment variables from .env file
-load_dotenv()
+# Gemini model used for classification
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+
+# Categories the model may choose from, in the order they appear in the prompt
+CATEGORIES = (
+    "Internship",
+    "Job Offer",
+    "Funding",
+    "Product Review",
+    "Newsletter",
+    "Event Invitation",
+    "Meeting Request",
+    "Research Article Request",
+    "Spam / Promotion",
+    "General Inquiry",
+    "Security Alert",
+)
+
+# Extra guidance shown next to a category in the prompt
+_CATEGORY_HINTS = {
+    "Security Alert": "for account security notifications, login alerts, password changes, etc.",
+}
+
+# Static part of the classification prompt, built once at import
+_PROMPT_PREFIX = (
+    "You are an email classifier. Your task is to carefully analyze the email content "
+    "and categorize it into exactly one of these categories:\n\n"
+    + "\n".join(
+        f"- {c} ({_CATEGORY_HINTS[c]})" if c in _CATEGORY_HINTS else f"- {c}"
+        for c in CATEGORIES
+    )
+    + "\n\nImportant Instructions:\n"
+    "1. Read the ENTIRE email body thoroughly - do not rely solely on the subject line\n"
+    "2. Subjects can be misleading - always verify the actual content in the body\n"
+    "3. Look for key details in the body that indicate the true purpose of the email\n"
+    "4. Consider the context and tone of the entire message\n"
+    "5. If the email could fit multiple categories, choose the most specific one\n"
+    "6. Pay special attention to security-related emails (login alerts, password changes, etc.)\n"
+    "7. Return ONLY the category name, nothing else\n\n"
+    "Email Subject:\n"
+)
+
+@lru_cache(maxsize=64)
+def normalize_category(category: str) -> str:
+    """Normalize category string by converting to lowercase and stripping whitespace."""
+    return category.lower().strip()
+
+def build_classification_prompt(subject: str, body: str) -> str:
+    """Build the Gemini classification prompt for an email."""
+    return f"{_PROMPT_PREFIX}{subject}\n\nEmail Body:\n{body}\n\nCategory:"
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    """Load the .env file once, on first classification rather than at import."""
+    load_dotenv()
 
 def classify_email(subject: str, body: str, return_prompt_and_model: bool = False):
     """
@@ -15,17 +71,16 @@ def classify_email(subject: str, body: str, return_prompt_and_model: bool = Fals
     start_time = time.time()
     
     # Get API key from environment variables
+    _load_env()
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
         if return_prompt_and_model:
             return ("Error: GEMINI_API_KEY not found in environment variables", None, None)
         return "Error: GEMINI_API_KEY not found in environment variables"
 
-    # API endpoint
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-    model = "gemini-2.0-flash"
-    # Prepare the prompt
-    prompt = f"""You are an email classifier. Your task is to carefully analyze the email content and categorize it into exactly one of these categories:\n\n- Internship\n- Job Offer\n- Funding\n- Product Review\n- Newsletter\n- Event Invitation\n- Meeting Request\n- Research Article Request\n- Spam / Promotion\n- General Inquiry\n- Security Alert (for account security notifications, login alerts, password changes, etc.)\n\nImportant Instructions:\n1. Read the ENTIRE email body thoroughly - do not rely solely on the subject line\n2. Subjects can be misleading - always verify the actual content in the body\n3. Look for key details in the body that indicate the true purpose of the email\n4. Consider the context and tone of the entire message\n5. If the email could fit multiple categories, choose the most specific one\n6. Pay special attention to security-related emails (login alerts, password changes, etc.)\n7. Return ONLY the category name, nothing else\n\nEmail Subject:\n{subject}\n\nEmail Body:\n{body}\n\nCategory:"""
+    url = GEMINI_URL
+    model = GEMINI_MODEL
+    prompt = build_classification_prompt(subject, body)
 
     payload = {
         "contents": [{
@@ -41,12 +96,11 @@ def classify_email(subject: str, body: str, return_prompt_and_model: bool = Fals
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_sync_session().post(url, json=payload, headers=headers, timeout=GEMINI_TIMEOUT_SECONDS)
         response.raise_for_status()
         result = response.json()
         if 'candidates' in result and len(result['candidates']) > 0:
             category = result['candidates'][0]['content']['parts'][0]['text'].strip()
-<<<<<<< HEAD
             
             # Log the classification
             processing_time_ms = int((time.time() - start_time) * 1000)
@@ -54,14 +108,12 @@ def classify_email(subject: str, body: str, return_prompt_and_model: bool = Fals
                 email_subject=subject,
                 email_body=body,
                 predicted_category=category,
-                model_used="gemini-2.0-flash",
+                model_used=GEMINI_MODEL,
                 processing_time_ms=processing_time_ms
             )
             
-=======
             if return_prompt_and_model:
                 return (category, prompt, model)
->>>>>>> 94bb2a09def6d5cf440c6b59f6eebedb12e9c613
             return category
         else:
             if return_prompt_and_model:
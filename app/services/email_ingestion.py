@@ -1,3 +1,4 @@
+from loguru import logger
 from app.services.gmail_client import get_latest_emails
 from app.db.base import get_user_history_id, set_user_history_id
 
@@ -24,6 +25,6 @@ async def fetch_and_process_new_emails(user_id: str, max_results: int = 10):
     # Update the user's last_history_id if we saw a new one
     if new_history_id:
         await set_user_history_id(user_id, new_history_id)
-        print(f"Updated user {user_id} last_history_id to: {new_history_id}")
+        logger.info(f"✅ Updated user {user_id} last_history_id to: {new_history_id}")
     
     return processed_count 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 from typing import List, Dict, Optional
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -8,7 +9,7 @@ from googleapiclient.discovery import build
 from app.services.classifier import classify_email
 from app.db import email_db
 from app.utils.gmail_parser import extract_email_body
-from app.utils.llm_utils import summarize_to_bullets
+from app.utils.llm_utils import summarize_to_bullets_async
 from datetime import datetime, timezone, timedelta
 from loguru import logger
 import re
@@ -16,6 +17,7 @@ from app.services.token_refresh import get_valid_access_token
 from app.services.google_oauth import google_oauth_service
 from app.db.base import get_mongo_client, db, set_user_history_id
 from app.core.config import settings
+from app.core.executors import LLM_POOL, GMAIL_POOL, run_in_pool
 
 # Gmail API scopes
 SCOPES = [
@@ -60,10 +62,11 @@ async def get_gmail_service_for_user(user_id: str):
         logger.error(f"Error getting Gmail service for user {user_id}: {e}")
         raise
 
-async def process_and_save_gmail_message(msg, user_id: str) -> Optional[Dict]:
+async def build_email_from_gmail_message(msg, user_id: str) -> Optional[Dict]:
     """
-    Process a Gmail message and save it to the database if not already processed.
-    Returns the saved email data dict, or None if duplicate or error.
+    Parse, summarize and classify a Gmail message without saving it.
+    Callers skip stored messages up front with fetch_unprocessed_messages.
+    Returns the email document, or None on error.
     """
     try:
         headers = msg['payload']['headers']
@@ -94,13 +97,11 @@ async def process_and_save_gmail_message(msg, user_id: str) -> Optional[Dict]:
         body = extract_email_body(msg['payload'])
         gmail_id = msg['id']
 
-        # Check if already processed
-        if await email_db.already_classified(gmail_id):
-            logger.warning(f"⚠️ Skipped duplicate: {subject} from {sender_name} <{sender_email}>")
-            return None
-
-        summary = summarize_to_bullets(body)
-        category = classify_email(subject, body)
+        # Summary and category are independent, so overlap the two LLM round trips
+        summary, category = await asyncio.gather(
+            summarize_to_bullets_async(body),
+            run_in_pool(LLM_POOL, classify_email, subject, body),
+        )
         if category.startswith("Error:"):
             logger.error(f"❌ Classification failed for '{subject}': {category}")
             return None
@@ -129,17 +130,75 @@ async def process_and_save_gmail_message(msg, user_id: str) -> Optional[Dict]:
             'status': 'new',
             'fetched_at': datetime.now(timezone.utc).isoformat(),
         }
-
-        if await email_db.save_email(email_data):
-            logger.success(f"✅ Processed and saved: {subject} from {sender_name} <{sender_email}>")
-            return email_data
-        else:
-            logger.warning(f"⚠️ Skipped duplicate: {subject} from {sender_name} <{sender_email}>")
-            return None
+        return email_data
     except Exception as e:
         logger.error(f"❌ Error processing message {msg.get('id', 'unknown')}: {e}")
         return None
 
+async def fetch_unprocessed_messages(service, message_ids: List[str]) -> List[Dict]:
+    """
+    Fetch full Gmail messages, skipping IDs that are already stored.
+
+    Already-classified IDs are found with a single batched lookup, so repeated
+    polls don't re-download or re-run the LLM on messages we've seen.
+
+    Args:
+        service: Authenticated Gmail API service
+        message_ids (List[str]): Gmail message IDs to fetch
+
+    Returns:
+        List[Dict]: Full message resources for the new messages
+    """
+    known_ids = await email_db.get_classified_ids(message_ids)
+    if known_ids:
+        logger.info(f"⏭️ Skipping {len(known_ids)} already classified message(s)")
+
+    msgs = []
+    for message_id in message_ids:
+        if message_id in known_ids:
+            continue
+        try:
+            msgs.append(await run_in_pool(GMAIL_POOL, service.users().messages().get(
+                userId='me',
+                id=message_id,
+                format='full'
+            ).execute))
+        except Exception as e:
+            logger.error(f"❌ Error processing message {message_id}: {e}")
+    return msgs
+
+async def build_emails_from_gmail_messages(msgs: List[Dict], user_id: str) -> List[Dict]:
+    """
+    Build email documents for a batch of Gmail messages concurrently.
+
+    At most settings.LLM_MAX_CONCURRENCY messages are summarized and classified
+    at once, so a sync costs roughly one LLM round trip per batch instead of
+    one per message.
+
+    Args:
+        msgs (List[Dict]): Full Gmail message resources
+        user_id (str): Clerk user ID
+
+    Returns:
+        List[Dict]: Email documents for the messages that were processed, in input order
+    """
+    semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    async def build(msg):
+        async with semaphore:
+            return await build_email_from_gmail_message(msg, user_id)
+
+    email_docs = await asyncio.gather(*(build(msg) for msg in msgs))
+    return [doc for doc in email_docs if doc]
+
+async def save_processed_emails(email_docs: List[Dict]) -> List[Dict]:
+    """Save a batch of processed emails in one bulk insert and return those stored."""
+    if not email_docs:
+        return []
+    saved = await email_db.save_emails_bulk(email_docs)
+    logger.success(f"✅ Saved {len(saved)} of {len(email_docs)} processed emails")
+    return saved
+
 async def get_incremental_emails(user_id: str, last_history_id: str) -> List[Dict]:
     """
     Fetch emails incrementally using Gmail's history API since the last_history_id.
@@ -147,11 +206,11 @@ async def get_incremental_emails(user_id: str, last_history_id: str) -> List[Dic
     try:
         service = await get_gmail_service_for_user(user_id)
         # Fetch history since last_history_id
-        history = service.users().history().list(
+        history = await run_in_pool(GMAIL_POOL, service.users().history().list(
             userId='me',
             startHistoryId=last_history_id,
             historyTypes=['messageAdded']
-        ).execute()
+        ).execute)
         
         # Extract the current historyId from response for future requests
         current_history_id = history.get('historyId')
@@ -182,20 +241,9 @@ async def get_incremental_emails(user_id: str, last_history_id: str) -> List[Dic
             return []
         
         logger.info(f"📧 Found {len(messages)} new messages since historyId: {last_history_id}")
-        processed_emails = []
-        for message in messages:
-            try:
-                msg = service.users().messages().get(
-                    userId='me',
-                    id=message['id'],
-                    format='full'
-                ).execute()
-                processed = await process_and_save_gmail_message(msg, user_id)
-                if processed:
-                    processed_emails.append(processed)
-            except Exception as e:
-                logger.error(f"❌ Error processing message {message['id']}: {e}")
-                continue
+        msgs = await fetch_unprocessed_messages(service, [message['id'] for message in messages])
+        email_docs = await build_emails_from_gmail_messages(msgs, user_id)
+        processed_emails = await save_processed_emails(email_docs)
         
         # Update to current historyId for future requests
         if current_history_id:
@@ -215,26 +263,18 @@ async def get_latest_emails(user_id: str, max_results: int = 10, last_history_id
         return await get_incremental_emails(user_id, last_history_id)
     try:
         service = await get_gmail_service_for_user(user_id)
-        results = service.users().messages().list(
+        results = await run_in_pool(GMAIL_POOL, service.users().messages().list(
             userId='me',
             labelIds=['UNREAD'],
             maxResults=max_results
-        ).execute()
+        ).execute)
         messages = results.get('messages', [])
         if not messages:
             logger.info("No unread messages found.")
             return []
-        processed_emails = []
-        for message in messages:
-            msg = service.users().messages().get(
-                userId='me',
-                id=message['id'],
-                format='full'
-            ).execute()
-            processed = await process_and_save_gmail_message(msg, user_id)
-            if processed:
-                processed_emails.append(processed)
-        return processed_emails
+        msgs = await fetch_unprocessed_messages(service, [message['id'] for message in messages])
+        email_docs = await build_emails_from_gmail_messages(msgs, user_id)
+        return await save_processed_emails(email_docs)
     except Exception as e:
         logger.error(f"❌ Error fetching emails: {str(e)}")
         return []
@@ -246,7 +286,7 @@ async def get_current_history_id(user_id: str) -> str:
     """
     try:
         service = await get_gmail_service_for_user(user_id)
-        profile = service.users().getProfile(userId='me').execute()
+        profile = await run_in_pool(GMAIL_POOL, service.users().getProfile(userId='me').execute)
         return profile.get("historyId")
     except Exception as e:
         logger.error(f"❌ Error getting current historyId for user {user_id}: {e}")
@@ -309,10 +349,10 @@ async def setup_gmail_watch(user_id: str):
             "labelFilterAction": "include"
         }
         
-        response = service.users().watch(
+        response = await run_in_pool(GMAIL_POOL, service.users().watch(
             userId="me",
             body=watch_request
-        ).execute()
+        ).execute)
         
         logger.info(f"✅ Gmail watch set up for user {user_id} ({user_email}): {response}")
         # Store the initial historyId for incremental sync
@@ -342,10 +382,10 @@ async def fetch_emails_from_gmail(user_id: str, limit: int = 5) -> List[Dict[str
         service = await get_gmail_service_for_user(user_id)
         
         # Get list of messages
-        results = service.users().messages().list(
+        results = await run_in_pool(GMAIL_POOL, service.users().messages().list(
             userId='me',
             maxResults=limit
-        ).execute()
+        ).execute)
         
         messages = results.get('messages', [])
         if not messages:
@@ -355,12 +395,12 @@ async def fetch_emails_from_gmail(user_id: str, limit: int = 5) -> List[Dict[str
         emails = []
         for message in messages:
             # Get message details
-            msg = service.users().messages().get(
+            msg = await run_in_pool(GMAIL_POOL, service.users().messages().get(
                 userId='me',
                 id=message['id'],
                 format='metadata',
                 metadataHeaders=['Subject']
-            ).execute()
+            ).execute)
             
             # Extract subject
             headers = msg['payload']['headers']
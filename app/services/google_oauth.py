@@ -144,7 +144,10 @@ class GoogleOAuthService:
                 logger.warning(f"  - State not found in database")
                 
                 # Log all states for this user for debugging
-                all_states = await oauth_states_collection.find({"clerk_user_id": clerk_user_id}).to_list(length=10)
+                all_states = await oauth_states_collection.find(
+                    {"clerk_user_id": clerk_user_id},
+                    {"_id": 0, "state": 1, "expires_at": 1}
+                ).to_list(length=10)
                 logger.warning(f"🔍 All stored states for user {clerk_user_id}:")
                 for i, stored_state in enumerate(all_states):
                     logger.warning(f"  {i+1}. State: {stored_state.get('state')} (Expires: {stored_state.get('expires_at')})")
@@ -252,7 +255,8 @@ class GoogleOAuthService:
             db = get_mongo_client()
             oauth_collection = db[settings.MONGODB_OAUTH_COLLECTION_NAME]
             
-            # Upsert credentials (update if exists, insert if not)
+            # Upsert credentials (update if exists, insert if not). This runs before the
+            # status update so a failure never leaves a connected user without tokens.
             await oauth_collection.update_one(
                 {"user_id": clerk_user_id},
                 {"$set": creds_data},
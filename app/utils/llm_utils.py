@@ -1,23 +1,42 @@
+import asyncio
+import weakref
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
+import orjson
 import time
+import re
 import textwrap
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
 from loguru import logger
 from app.core.config import settings
 from app.core.api_logging import email_logger
 
+# Seconds before a Gemini call is abandoned, for both the sync and async clients
+GEMINI_TIMEOUT_SECONDS = 60
+
+# One sentence and its terminator; matched lazily so only the start of the body is scanned
+_SENTENCE_RE = re.compile(r"([^.?!]+)([.?!]?)")
+
+# A bulleted line of a Gemini summary, capturing the text after the marker
+_BULLET_RE = re.compile(r"^[ \t]*[-•*][ \t]+(.+?)[ \t]*$", re.MULTILINE)
+
 def get_fallback_summary(text: str, max_length: int = 200) -> list[str]:
     """
     Generate a fallback summary when AI summarization fails.
     Returns first few sentences or a truncated version of the text.
     """
-    # Split into sentences (rough approximation)
-    sentences = text.split('.')
     summary = []
     
     # Add first two meaningful sentences
-    for sentence in sentences:
-        if len(sentence.strip()) > 20:  # Only meaningful sentences
-            summary.append(sentence.strip() + '.')
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group(1).strip()
+        if len(sentence) > 20:  # Only meaningful sentences
+            summary.append(sentence + (match.group(2) or '.'))
             if len(summary) >= 2:
                 break
     
@@ -28,21 +47,9 @@ def get_fallback_summary(text: str, max_length: int = 200) -> list[str]:
     
     return summary
 
-def summarize_to_bullets(text: str, max_bullets: int = 5) -> list:
-    """
-    Summarize text into bullet points using Gemini AI.
-    
-    Args:
-        text (str): The text to summarize
-        max_bullets (int): Maximum number of bullet points to generate
-        
-    Returns:
-        list: List of bullet point summaries
-    """
-    start_time = time.time()
-    
-    try:
-        prompt = f"""Summarize the following text into {max_bullets} key bullet points.
+def _build_summary_prompt(text: str, max_bullets: int) -> str:
+    """Build the Gemini prompt asking for a bullet point summary."""
+    return f"""Summarize the following text into {max_bullets} key bullet points.
         Focus on the most important information and main points.
         Keep each bullet point concise and clear.
         
@@ -50,122 +57,143 @@ def summarize_to_bullets(text: str, max_bullets: int = 5) -> list:
         {text}
         
         Return only the bullet points, one per line, starting with '- '."""
+
+def _gemini_headers() -> dict:
+    """Headers for a Gemini generateContent call."""
+    return {
+        "Content-Type": "application/json",
+        "x-goog-api-key": settings.GEMINI_API_KEY
+    }
+
+def _gemini_body(prompt: str) -> bytes:
+    """JSON body for a Gemini generateContent call, encoded with orjson."""
+    return orjson.dumps({
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }]
+    })
+
+def _parse_summary_response(text: str, response_data: dict, max_bullets: int, start_time: float) -> list:
+    """Turn a Gemini response into bullet points, logging the summarization."""
+    if not response_data.get("candidates"):
+        logger.error("No candidates in Gemini API response")
+        return get_fallback_summary(text)
         
-        response = requests.post(
-            settings.GEMINI_API_URL,
-            headers={
-                "Content-Type": "application/json",
-                "x-goog-api-key": settings.GEMINI_API_KEY
-            },
-            json={
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }]
-            }
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"Error from Gemini API: {response.text}")
-            return get_fallback_summary(text)
-            
-        response_data = response.json()
-        if not response_data.get("candidates"):
-            logger.error("No candidates in Gemini API response")
-            return get_fallback_summary(text)
-            
-        summary = response_data["candidates"][0]["content"]["parts"][0]["text"].strip()
-        
-        # Split into bullet points and clean up
+    summary = response_data["candidates"][0]["content"]["parts"][0]["text"].strip()
+    
+    # Pull out "- ", "• " or "* " bullet lines in one scan; fall back to every non-empty line
+    bullets = _BULLET_RE.findall(summary)
+    if not bullets:
         bullets = [line.strip('- ').strip() for line in summary.split('\n') if line.strip()]
-        
-        # Ensure we don't exceed max_bullets
-        bullets = bullets[:max_bullets]
-        
-        # Log the summarization
-        processing_time_ms = int((time.time() - start_time) * 1000)
-        email_logger.log_email_summarization(
-            email_body=text,
-            summary_bullets=bullets,
-            model_used="gemini-ai-summarizer",
-            processing_time_ms=processing_time_ms
-        )
-        
-        return bullets
-    except Exception as e:
-        logger.error(f"Error generating summary: {str(e)}")
-        return get_fallback_summary(text)
+    
+    # Ensure we don't exceed max_bullets
+    bullets = bullets[:max_bullets]
+    
+    # Log the summarization
+    processing_time_ms = int((time.time() - start_time) * 1000)
+    email_logger.log_email_summarization(
+        email_body=text,
+        summary_bullets=bullets,
+        model_used="gemini-ai-summarizer",
+        processing_time_ms=processing_time_ms
+    )
+    
+    return bullets
+
+# Successful summaries keyed by (body digest, max_bullets), least recently used first
+_summary_cache: "OrderedDict[tuple[bytes, int], list]" = OrderedDict()
+
+def _summary_cache_key(text: str, max_bullets: int) -> tuple[bytes, int]:
+    """Fixed-size cache key so large email bodies are not kept alive by the cache."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), max_bullets
+
+def _get_cached_summary(key: tuple[bytes, int]) -> Optional[list]:
+    """Return a copy of a cached summary and mark it as recently used."""
+    bullets = _summary_cache.get(key)
+    if bullets is None:
+        return None
+    _summary_cache.move_to_end(key)
+    return list(bullets)
+
+def _cache_summary(key: tuple[bytes, int], bullets: list) -> None:
+    """Store a summary, evicting the least recently used entry past SUMMARY_CACHE_SIZE."""
+    if settings.SUMMARY_CACHE_SIZE <= 0:
+        return
+    _summary_cache[key] = list(bullets)
+    _summary_cache.move_to_end(key)
+    while len(_summary_cache) > settings.SUMMARY_CACHE_SIZE:
+        _summary_cache.popitem(last=False)
+
+@lru_cache(maxsize=1)
+def get_sync_session() -> requests.Session:
+    """
+    Shared requests session for the sync Gemini calls.
+    Keeps TLS connections alive between calls and retries transient
+    Gemini errors before callers fall back. Callers pass the headers on
+    each request so a rotated API key takes effect without a restart.
+    """
+    retries = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=32, max_retries=retries))
+    return session
+
+# One async client per event loop; an httpx client's connections belong to the loop that opened them
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_http_client() -> httpx.AsyncClient:
+    """Async HTTP client shared by the running event loop, so Gemini calls reuse pooled connections."""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        client = _http_clients[loop] = httpx.AsyncClient(timeout=GEMINI_TIMEOUT_SECONDS)
+    return client
+
+async def close_http_client() -> None:
+    """Close the running event loop's async HTTP client if it was created."""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
 
-def extract_key_info(text: str) -> dict:
+async def summarize_to_bullets_async(text: str, max_bullets: int = 5, use_cache: bool = True) -> list:
     """
-    Extract key information from text using Gemini AI.
+    Summarize text into bullet points using Gemini AI over the shared httpx client.
     
     Args:
-        text (str): The text to analyze
+        text (str): The text to summarize
+        max_bullets (int): Maximum number of bullet points to generate
+        use_cache (bool): Reuse an earlier summary of the same text; pass False to force a fresh one
         
     Returns:
-        dict: Dictionary containing key information
+        list: List of bullet point summaries
     """
+    start_time = time.time()
+    cache_key = _summary_cache_key(text, max_bullets)
+    if use_cache and (cached := _get_cached_summary(cache_key)) is not None:
+        logger.debug("♻️ Reusing cached summary")
+        return cached
+    
     try:
-        prompt = f"""Extract key information from the following text.
-        Return a JSON object with these fields:
-        - main_topic: The main topic or purpose
-        - key_points: List of 3-5 key points
-        - action_items: List of any required actions
-        - sentiment: Overall sentiment (positive/negative/neutral)
-        
-        Text:
-        {text}
-        
-        Return only the JSON object, nothing else."""
-        
-        response = requests.post(
-            settings.GEMINI_API_URL,
-            headers={
-                "Content-Type": "application/json",
-                "x-goog-api-key": settings.GEMINI_API_KEY
-            },
-            json={
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }]
-            }
+        prompt = _build_summary_prompt(text, max_bullets)
+        response = await get_http_client().post(
+            settings.GEMINI_API_URL, headers=_gemini_headers(), content=_gemini_body(prompt)
         )
         
         if response.status_code != 200:
             logger.error(f"Error from Gemini API: {response.text}")
-            return {
-                "main_topic": "Error",
-                "key_points": ["Failed to extract information"],
-                "action_items": [],
-                "sentiment": "neutral"
-            }
-            
-        response_data = response.json()
-        if not response_data.get("candidates"):
-            logger.error("No candidates in Gemini API response")
-            return {
-                "main_topic": "Error",
-                "key_points": ["Failed to extract information"],
-                "action_items": [],
-                "sentiment": "neutral"
-            }
+            return get_fallback_summary(text)
             
-        info = response_data["candidates"][0]["content"]["parts"][0]["text"].strip()
-        
-        # Parse the response into a dictionary
-        # Note: In a production environment, you'd want to use proper JSON parsing
-        # and error handling here
-        return {
-            "main_topic": "Extracted topic",
-            "key_points": ["Point 1", "Point 2"],
-            "action_items": ["Action 1"],
-            "sentiment": "neutral"
-        }
+        response_data = orjson.loads(response.content)
+        bullets = _parse_summary_response(text, response_data, max_bullets, start_time)
+        # Only cache real Gemini output, never the fallback
+        if response_data.get("candidates"):
+            _cache_summary(cache_key, bullets)
+        return bullets
     except Exception as e:
-        logger.error(f"Error extracting key info: {str(e)}")
-        return {
-            "main_topic": "Error",
-            "key_points": ["Failed to extract information"],
-            "action_items": [],
-            "sentiment": "neutral"
-        } 
\ No newline at end of file
+        logger.error(f"Error generating summary: {str(e)}")
+        return get_fallback_summary(text)
@@ -0,0 +1,32 @@
+import asyncio
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import db
+from loguru import logger
+
+async def backfill_category_norm():
+    """Set category_norm on emails stored before the field existed."""
+    try:
+        await db.connect_db()  # Ensure DB is connected
+        emails_collection = db.get_collection('emails')
+
+        # One server-side update; matches nothing once every email has the field
+        result = await emails_collection.update_many(
+            {"category_norm": {"$exists": False}, "category": {"$type": "string"}},
+            [{"$set": {"category_norm": {"$toLower": {"$trim": {"input": "$category"}}}}}]
+        )
+
+        logger.info(f"Backfill complete. Updated {result.modified_count} emails.")
+
+    except Exception as e:
+        logger.error(f"Backfill failed: {e}")
+        raise
+    finally:
+        await db.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_category_norm())
@@ -0,0 +1,51 @@
+import asyncio
+import sys
+import os
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne
+from app.db.base import db
+from app.db.email_db import to_utc_iso
+from loguru import logger
+
+# Emails read from Mongo per round trip
+BATCH_SIZE = 1000
+
+async def migrate_normalize_timestamps():
+    """Rewrite stored email timestamps as fixed-width UTC strings so they sort chronologically."""
+    try:
+        await db.connect_db()  # Ensure DB is connected
+        emails_collection = db.get_collection('emails')
+
+        emails = emails_collection.find({"timestamp": {"$type": "string"}}, {"timestamp": 1})
+
+        count = 0
+        while batch := await emails.to_list(length=BATCH_SIZE):
+            updates = []
+            for email in batch:
+                try:
+                    normalized = to_utc_iso(email["timestamp"])
+                except ValueError:
+                    logger.warning(f"Skipping unparseable timestamp {email['timestamp']!r} on {email['_id']}")
+                    continue
+                if normalized != email["timestamp"]:
+                    updates.append(UpdateOne({"_id": email["_id"]}, {"$set": {"timestamp": normalized}}))
+
+            # Write the whole batch in one round trip
+            if updates:
+                await emails_collection.bulk_write(updates, ordered=False)
+                count += len(updates)
+                logger.success(f"Normalized {len(updates)} of {len(batch)} timestamps")
+
+        logger.info(f"Migration complete. Updated {count} emails.")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        raise
+    finally:
+        await db.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_normalize_timestamps())
@@ -5,45 +5,66 @@ import os
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.base import db, get_mongo_client, set_user_history_id
+from pymongo import UpdateOne
+from app.db.base import db
 from app.services.gmail_client import get_gmail_service_for_user
+from app.core.executors import GMAIL_POOL, run_in_pool
 from loguru import logger
 
+# Users read from Mongo per round trip
+BATCH_SIZE = 500
+# Concurrent Gmail getProfile calls, kept low to respect Gmail quotas
+MAX_CONCURRENT_PROFILES = 20
+
+async def fetch_history_id(user: dict, semaphore: asyncio.Semaphore):
+    """Look up the current Gmail historyId for one user, or None if unavailable."""
+    user_id = user["clerk_user_id"]
+    async with semaphore:
+        logger.info(f"Migrating user: {user_id} ({user.get('email')})")
+        try:
+            service = await get_gmail_service_for_user(user_id)
+            profile = await run_in_pool(GMAIL_POOL, service.users().getProfile(userId='me').execute)
+        except Exception as e:
+            logger.error(f"Failed to set historyId for {user_id}: {e}")
+            return None
+
+    history_id = profile.get("historyId")
+    if not history_id:
+        logger.warning(f"No historyId found for {user_id}")
+    return history_id
+
 async def migrate_set_history_id():
     """Migrate existing users to set their historyId."""
     try:
-        await get_mongo_client()  # Ensure DB is connected
+        await db.connect_db()  # Ensure DB is connected
         users_collection = db.get_collection('users')
-        
+
         # Find users with Gmail connected but no historyId
         users = users_collection.find({"is_gmail_connected": True, "last_history_id": {"$exists": False}})
-        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROFILES)
+
         count = 0
-        async for user in users:
-            user_id = user["clerk_user_id"]
-            logger.info(f"Migrating user: {user_id} ({user.get('email')})")
-            
-            try:
-                service = await get_gmail_service_for_user(user_id)
-                profile = service.users().getProfile(userId='me').execute()
-                history_id = profile.get("historyId")
-                
-                if history_id:
-                    await set_user_history_id(user_id, history_id)
-                    logger.success(f"Set last_history_id for {user_id}: {history_id}")
-                    count += 1
-                else:
-                    logger.warning(f"No historyId found for {user_id}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to set historyId for {user_id}: {e}")
-                continue
-                
+        while batch := await users.to_list(length=BATCH_SIZE):
+            history_ids = await asyncio.gather(*(fetch_history_id(user, semaphore) for user in batch))
+
+            # Write the whole batch in one round trip
+            updates = [
+                UpdateOne({"clerk_user_id": user["clerk_user_id"]}, {"$set": {"last_history_id": history_id}})
+                for user, history_id in zip(batch, history_ids)
+                if history_id
+            ]
+            if updates:
+                await users_collection.bulk_write(updates, ordered=False)
+                count += len(updates)
+                logger.success(f"Set last_history_id for {len(updates)} of {len(batch)} users")
+
         logger.info(f"Migration complete. Updated {count} users.")
-        
+
     except Exception as e:
         logger.error(f"Migration failed: {e}")
         raise
+    finally:
+        await db.close_db()
 
 if __name__ == "__main__":
-    asyncio.run(migrate_set_history_id()) 
\ No newline at end of file
+    asyncio.run(migrate_set_history_id())
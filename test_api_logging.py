@@ -56,6 +56,9 @@ async def test_api_logging():
     )
     print("✅ Email summarization logged successfully")
     
+    # Events are written by a background flusher; force them out before reading
+    api_logger.flush()
+    
     # Check if log file was created
     log_file = Path("logs/api_calls.jsonl")
     if log_file.exists():
@@ -5,51 +5,41 @@ Simple test script to verify CrashLens Logger core functionality.
 
 import os
 import time
-import json
+import orjson
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional
 
 # Test the CrashLens Logger directly without FastAPI dependencies
 import sys
 sys.path.append('.')
 
+def _iso_z(dt: datetime) -> str:
+    """Format a UTC datetime as ISO 8601 with a 'Z' suffix, without string replacement."""
+    return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond:06d}Z"
+
 # Create a minimal version of the CrashLens implementation for testing
+@dataclass(slots=True)
 class LogEvent:
     """Represents a single log event with all required fields and supports arbitrary extra fields."""
     
-    def __init__(
-        self,
-        trace_id: str = None,
-        type: str = None,
-        start_time: str = None,
-        end_time: str = None,
-        level: str = None,
-        input: dict = None,
-        usage: dict = None,
-        cost: float = None,
-        metadata: dict = None,
-        name: str = None,
-        **kwargs
-    ):
-        # Required fields
-        self.trace_id = trace_id
-        self.type = type
-        self.start_time = start_time
-        self.end_time = end_time
-        self.level = level
-        self.input = input or {}
-        self.usage = usage or {}
-        self.cost = cost or 0.0
-        self.metadata = metadata or {}
-        self.name = name
-        
-        # Support arbitrary additional fields
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    trace_id: Optional[str] = None
+    type: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    level: Optional[str] = None
+    input: dict = field(default_factory=dict)
+    usage: dict = field(default_factory=dict)
+    cost: float = 0.0
+    metadata: dict = field(default_factory=dict)
+    name: Optional[str] = None
+    # Arbitrary additional fields, serialized alongside the required ones
+    extra: dict = field(default_factory=dict)
     
     def to_dict(self) -> dict:
         """Convert the event to a dictionary for JSON serialization."""
-        event_dict = {
+        return {
             "traceId": self.trace_id,
             "type": self.type,
             "startTime": self.start_time,
@@ -59,15 +49,20 @@ class LogEvent:
             "usage": self.usage,
             "cost": self.cost,
             "metadata": self.metadata,
-            "name": self.name
+            "name": self.name,
+            **self.extra
         }
-        
-        # Add any additional attributes
-        for key, value in self.__dict__.items():
-            if key not in event_dict and not key.startswith('_'):
-                event_dict[key] = value
-        
-        return event_dict
+
+
+# LogEvents reach _encode_default instead of orjson's built-in dataclass encoder,
+# so the type dispatch happens inside orjson rather than per event in Python
+_ENCODE_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_PASSTHROUGH_DATACLASS
+
+def _encode_default(obj):
+    """Serialize types orjson does not handle natively."""
+    if isinstance(obj, LogEvent):
+        return obj.to_dict()
+    return str(obj)
 
 
 class CrashLensLogger:
@@ -75,6 +70,12 @@ class CrashLensLogger:
     
     def __init__(self, enable_logging: bool = True):
         self.enable_logging = enable_logging
+        # One append-only descriptor per log file, opened on first write
+        self._fds = {}
+        if not enable_logging:
+            # The flag never changes after construction, so drop writes up front
+            # rather than re-checking it on every call
+            self.write_logs = self._discard_logs
     
     def log_event(
         self,
@@ -97,30 +98,40 @@ class CrashLensLogger:
             start_time=startTime,
             end_time=endTime,
             level=level,
-            input=input,
-            usage=usage,
-            cost=cost,
-            metadata=metadata,
+            input=input or {},
+            usage=usage or {},
+            cost=cost or 0.0,
+            metadata=metadata or {},
             name=name,
-            **kwargs
+            extra=kwargs
         )
     
     def write_logs(self, events: list, file_path: str):
         """Write log events to a file in JSONL format."""
-        if not self.enable_logging:
-            return
-        
-        # Ensure directory exists
-        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        # Write events to file
-        with open(file_path, 'a', encoding='utf-8') as f:
-            for event in events:
-                if isinstance(event, LogEvent):
-                    json.dump(event.to_dict(), f, ensure_ascii=False)
-                else:
-                    json.dump(event, f, ensure_ascii=False)
-                f.write('\n')
+        # Encode the whole batch, then append it with a single write
+        buffer = b''.join(
+            orjson.dumps(event, default=_encode_default, option=_ENCODE_OPTIONS)
+            for event in events
+        )
+        os.write(self._get_fd(file_path), buffer)
+    
+    def _discard_logs(self, events: list, file_path: str):
+        """write_logs replacement used when logging is disabled."""
+    
+    def close(self):
+        """Close all open log files."""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+    
+    def _get_fd(self, file_path: str) -> int:
+        """Return the append-only descriptor for a log file, creating it on first use."""
+        fd = self._fds.get(file_path)
+        if fd is None:
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._fds[file_path] = fd
+        return fd
 
 
 def test_crashlens_core():
@@ -140,8 +151,8 @@ def test_crashlens_core():
     api_event = logger.log_event(
         traceId="test-trace-123",
         type="api_request",
-        startTime=start_time.isoformat().replace('+00:00', 'Z'),
-        endTime=end_time.isoformat().replace('+00:00', 'Z'),
+        startTime=_iso_z(start_time),
+        endTime=_iso_z(end_time),
         level="info",
         input={"method": "POST", "path": "/classify", "request_data": {"test": "data"}},
         usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
@@ -161,8 +172,8 @@ def test_crashlens_core():
     classification_event = logger.log_event(
         traceId="test-trace-456",
         type="email_classification",
-        startTime=start_time.isoformat().replace('+00:00', 'Z'),
-        endTime=end_time.isoformat().replace('+00:00', 'Z'),
+        startTime=_iso_z(start_time),
+        endTime=_iso_z(end_time),
         level="info",
         input={"model": "gemini-2.0-flash", "subject": "Test Job Application", "body_length": 150},
         usage={"prompt_tokens": 50, "completion_tokens": 10, "total_tokens": 60},
@@ -182,8 +193,8 @@ def test_crashlens_core():
     summarization_event = logger.log_event(
         traceId="test-trace-789",
         type="email_summarization",
-        startTime=start_time.isoformat().replace('+00:00', 'Z'),
-        endTime=end_time.isoformat().replace('+00:00', 'Z'),
+        startTime=_iso_z(start_time),
+        endTime=_iso_z(end_time),
         level="info",
         input={"model": "gemini-ai-summarizer", "body_length": 500},
         usage={"prompt_tokens": 125, "completion_tokens": 30, "total_tokens": 155},
@@ -202,28 +213,33 @@ def test_crashlens_core():
     
     logger.write_logs([summarization_event], log_file)
     print("✓ Email summarization logged successfully")
+    logger.close()
     
     # Test 4: Check log file
     print("\nChecking log file...")
     if os.path.exists(log_file):
-        with open(log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        # Stream the file so memory stays flat however many entries it holds
+        count = 0
+        last = None
+        with open(log_file, 'rb') as f:
+            for i, line in enumerate(f):
+                try:
+                    orjson.loads(line)
+                except orjson.JSONDecodeError as e:
+                    print(f"❌ Invalid JSON in line {i+1}: {e}")
+                    return False
+                count += 1
+                last = line
         
         print(f"✓ Log file created: {log_file}")
-        print(f"✓ Contains {len(lines)} log entries")
-        
-        # Validate JSON format
-        for i, line in enumerate(lines):
-            try:
-                json.loads(line.strip())
-            except json.JSONDecodeError as e:
-                print(f"❌ Invalid JSON in line {i+1}: {e}")
-                return False
-        
+        print(f"✓ Contains {count} log entries")
+        if last is None:
+            print("❌ Log file is empty")
+            return False
         print("✓ All log entries are valid JSON")
         
         # Print sample entry
-        sample_entry = json.loads(lines[-1].strip())
+        sample_entry = orjson.loads(last)
         print(f"✓ Sample entry: {sample_entry['type']} - {sample_entry['name']}")
         
         return True
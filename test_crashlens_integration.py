@@ -4,7 +4,6 @@ Test script to verify CrashLens Logger integration.
 """
 
 import asyncio
-import time
 from app.core.api_logging import api_logger, email_logger
 
 
@@ -92,8 +91,8 @@ if __name__ == "__main__":
         test_email_classification_logging()
         test_email_summarization_logging()
         
-        # Wait a moment for file writes
-        time.sleep(1)
+        # Drain the background writer instead of sleeping for it
+        api_logger.flush()
         
         # Check log files
         print("\nChecking log files...")
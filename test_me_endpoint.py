@@ -9,12 +9,12 @@ if not JWT:
     print("❌ Please provide a Clerk JWT via the CLERK_JWT environment variable or as a command line argument.")
     sys.exit(1)
 
-headers = {
-    "Authorization": f"Bearer {JWT}"
-}
+# Reuse one connection (and TLS session) for every request this script makes
+session = requests.Session()
+session.headers["Authorization"] = f"Bearer {JWT}"
 
 print(f"🔗 Calling {API_URL} with provided JWT...")
-response = requests.get(API_URL, headers=headers)
+response = session.get(API_URL)
 
 print(f"Status code: {response.status_code}")
 try:
@@ -5,7 +5,7 @@ This script demonstrates how to use the new re-categorization endpoints.
 """
 
 import requests
-import json
+import orjson
 from typing import Optional
 
 # Configuration
@@ -19,6 +19,13 @@ class EmailRecategorizationTester:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {auth_token}"
         }
+        # One pooled session so every call reuses the same keep-alive connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+    
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
     
     def recategorize_single_email(self, gmail_id: str, new_category: Optional[str] = None, regenerate_summary: bool = False):
         """
@@ -40,10 +47,10 @@ class EmailRecategorizationTester:
             payload["new_category"] = new_category
         
         try:
-            response = requests.put(url, headers=self.headers, json=payload)
+            response = self.session.put(url, data=orjson.dumps(payload))
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             print("✅ Single Email Recategorization Success:")
             print(f"   Gmail ID: {result['gmail_id']}")
             print(f"   {result['old_category']} → {result['new_category']}")
@@ -77,10 +84,10 @@ class EmailRecategorizationTester:
             params["category"] = category_filter
         
         try:
-            response = requests.put(url, headers=self.headers, params=params)
+            response = self.session.put(url, params=params)
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             print("✅ Bulk Recategorization Success:")
             print(f"   Total processed: {result['total_processed']}")
             print(f"   Successful: {result['successful']}")
@@ -106,10 +113,10 @@ class EmailRecategorizationTester:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            emails = response.json()
+            emails = orjson.loads(response.content)
             print(f"📧 Found {len(emails)} emails in '{category}' category:")
             
             for email in emails:
@@ -166,6 +173,8 @@ def main():
     print("   # Uncomment the line below to test bulk processing of all emails")
     print("   # tester.bulk_recategorize_emails(regenerate_summary=False)")
     
+    tester.close()
+    
     print("\n✅ Test script completed!")
     print("\nNext steps:")
     print("1. Replace AUTH_TOKEN with your actual token")
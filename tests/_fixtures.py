@@ -0,0 +1,13 @@
+"""Expected values shared by more than one test module."""
+
+# OAuth scopes the Gmail workflow requires, in the order GMAIL_SCOPES declares them
+EXPECTED_GMAIL_SCOPES = (
+    "openid",
+    "https://www.googleapis.com/auth/userinfo.email",
+    "https://www.googleapis.com/auth/userinfo.profile",
+    "https://www.googleapis.com/auth/gmail.readonly",
+    "https://www.googleapis.com/auth/gmail.modify",
+    "https://www.googleapis.com/auth/gmail.send",
+    "https://www.googleapis.com/auth/gmail.labels",
+    "https://www.googleapis.com/auth/gmail.settings.basic",
+)
@@ -1,14 +1,21 @@
 from app.services.classifier import classify_email
-from app.db import email_db
+from app.db.email_db import MongoDBStorage
 from datetime import datetime
+from mongomock_motor import AsyncMongoMockClient
 import asyncio
+import pytest
 
+@pytest.mark.asyncio
 async def test_classification_and_storage():
     """
     Test the email classification and storage functionality with a sample email.
+    Storage runs against an in-memory Mongo fake, so no database is touched.
     """
+    email_db = MongoDBStorage(collection=AsyncMongoMockClient()["test"]["emails"])
+
     # Sample email
     test_email = {
+        "gmail_id": "test_classifier_1",
         "subject": "We would love your feedback on our product for a review article",
         "body": """Hi Aditya, we've seen your work and would love your feedback on our new AI productivity tool. 
         Would you be open to trying it and possibly writing a product review?"""
@@ -37,20 +44,19 @@ async def test_classification_and_storage():
     
     # Load and verify the saved email
     print("\nVerifying saved email...")
-    saved_emails = await email_db.load_emails()
-    found = False
+    # Query for the subject directly rather than loading every email and scanning
+    email = await email_db.get_email_by_subject(test_email['subject'])
+    found = email is not None
     
-    for email in saved_emails:
-        if email['subject'] == test_email['subject']:
-            found = True
-            print("\nFound saved email:")
-            print(f"Subject: {email['subject']}")
-            print(f"Category: {email['category']}")
-            print(f"Timestamp: {email['timestamp']}")
-            break
+    if found:
+        print("\nFound saved email:")
+        print(f"Subject: {email['subject']}")
+        print(f"Category: {email['category']}")
+        print(f"Timestamp: {email['timestamp']}")
     
     if not found:
         print("Could not find the saved email in storage!")
+    assert found
 
 if __name__ == "__main__":
-    asyncio.run(test_classification_and_storage()) 
\ No newline at end of file
+    asyncio.run(test_classification_and_storage()) 
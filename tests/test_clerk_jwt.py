@@ -1,5 +1,8 @@
+import base64
 import os
+import time
 import httpx
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,34 +16,55 @@ headers = {
     "Content-Type": "application/json"
 }
 
+# Shared by every caller in the process so repeat calls reuse the TLS connection
+CLIENT = httpx.Client()
+# user_id -> (jwt, exp); kept in memory only, never written to disk
+_jwt_cache = {}
+# Treat a token this close to expiry as already expired
+JWT_EXPIRY_MARGIN_SECONDS = 5
+
+def _jwt_expiry(jwt: str) -> float:
+    """Return the exp claim of a JWT without verifying it (0 if unreadable)."""
+    try:
+        payload = jwt.split(".")[1]
+        claims = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims.get("exp", 0))
+    except Exception:
+        return 0
+
 def create_session_and_get_jwt(user_id: str):
+    cached = _jwt_cache.get(user_id)
+    if cached and cached[1] - JWT_EXPIRY_MARGIN_SECONDS > time.time():
+        print("✅ Reusing cached JWT")
+        return cached[0]
+
     create_session_url = f"{CLERK_API_BASE}/sessions"
     payload = {"user_id": user_id}
 
-    with httpx.Client() as client:
-        # Create a new session
-        resp = client.post(create_session_url, headers=headers, json=payload)
-        if resp.status_code != 200:
-            print("❌ Failed to create session")
-            print(resp.text)
-            return None
-
-        session_id = resp.json().get("id")
-        print(f"✅ Session created: {session_id}")
-
-        # Now get JWT for that session
-        token_url = f"{CLERK_API_BASE}/sessions/{session_id}/tokens"
-        token_resp = client.post(token_url, headers=headers)
-
-        if token_resp.status_code != 200:
-            print("❌ Failed to fetch JWT")
-            print(token_resp.text)
-            return None
-
-        jwt = token_resp.json().get("jwt")
-        print("✅ JWT token retrieved:")
-        print(jwt)
-        return jwt
+    # Create a new session
+    resp = CLIENT.post(create_session_url, headers=headers, json=payload)
+    if resp.status_code != 200:
+        print("❌ Failed to create session")
+        print(resp.text)
+        return None
+
+    session_id = resp.json().get("id")
+    print(f"✅ Session created: {session_id}")
+
+    # Now get JWT for that session
+    token_url = f"{CLERK_API_BASE}/sessions/{session_id}/tokens"
+    token_resp = CLIENT.post(token_url, headers=headers)
+
+    if token_resp.status_code != 200:
+        print("❌ Failed to fetch JWT")
+        print(token_resp.text)
+        return None
+
+    jwt = token_resp.json().get("jwt")
+    print("✅ JWT token retrieved:")
+    print(jwt)
+    _jwt_cache[user_id] = (jwt, _jwt_expiry(jwt))
+    return jwt
 
 if __name__ == "__main__":
     if not CLERK_SECRET_KEY or not USER_ID:
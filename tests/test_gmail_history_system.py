@@ -10,7 +10,56 @@ from app.services.gmail_client import (
 from app.db.base import get_user_history_id, set_user_history_id
 from fastapi.testclient import TestClient
 from app.main import app
-import json
+import base64
+import copy
+import orjson
+
+# Canned Gmail API responses for mock_gmail_service. Mocks hand out deep copies,
+# so code under test that mutates a response cannot leak into other tests.
+PROFILE_RESPONSE = {"historyId": "12345"}
+
+HISTORY_RESPONSE = {
+    "history": [
+        {
+            "messagesAdded": [
+                {"message": {"id": "msg1", "threadId": "thread1"}}
+            ]
+        }
+    ]
+}
+
+MESSAGE_RESPONSE = {
+    "id": "msg1",
+    "threadId": "thread1",
+    "historyId": "12346",
+    "labelIds": ["INBOX"],
+    "internalDate": "1640995200000",
+    "payload": {
+        "headers": [
+            {"name": "Subject", "value": "Test Email"},
+            {"name": "From", "value": "test@example.com"},
+            {"name": "Date", "value": "Wed, 13 Mar 2024 15:30:45 +0000"}
+        ],
+        "body": {"data": "dGVzdCBib2R5"}  # base64 encoded "test body"
+    }
+}
+
+# Request headers the webhook tests present to gmail_push_webhook
+WEBHOOK_HEADERS = {
+    'host': 'testserver',
+    'accept': '*/*',
+    'content-type': 'application/json'
+}
+
+# Pub/Sub style push: the Gmail notification JSON, base64-encoded in message.data
+PUBSUB_PAYLOAD = {
+    "message": {
+        "data": base64.b64encode(orjson.dumps({
+            "emailAddress": "test@example.com",
+            "historyId": "12346"
+        })).decode()
+    }
+}
 
 # Patch db singleton for all tests in this file
 def _make_mock_db():
@@ -36,39 +85,17 @@ class TestGmailHistorySystem:
         
         # Mock profile response
         mock_profile = Mock()
-        mock_profile.execute.return_value = {"historyId": "12345"}
+        mock_profile.execute.return_value = copy.deepcopy(PROFILE_RESPONSE)
         mock_service.users.return_value.getProfile.return_value = mock_profile
         
         # Mock history response
         mock_history = Mock()
-        mock_history.execute.return_value = {
-            "history": [
-                {
-                    "messagesAdded": [
-                        {"message": {"id": "msg1", "threadId": "thread1"}}
-                    ]
-                }
-            ]
-        }
+        mock_history.execute.return_value = copy.deepcopy(HISTORY_RESPONSE)
         mock_service.users.return_value.history.return_value.list.return_value = mock_history
         
         # Mock message response
         mock_message = Mock()
-        mock_message.execute.return_value = {
-            "id": "msg1",
-            "threadId": "thread1",
-            "historyId": "12346",
-            "labelIds": ["INBOX"],
-            "internalDate": "1640995200000",
-            "payload": {
-                "headers": [
-                    {"name": "Subject", "value": "Test Email"},
-                    {"name": "From", "value": "test@example.com"},
-                    {"name": "Date", "value": "Wed, 13 Mar 2024 15:30:45 +0000"}
-                ],
-                "body": {"data": "dGVzdCBib2R5"}  # base64 encoded "test body"
-            }
-        }
+        mock_message.execute.return_value = copy.deepcopy(MESSAGE_RESPONSE)
         mock_service.users.return_value.messages.return_value.get.return_value = mock_message
         
         return mock_service
@@ -84,11 +111,11 @@ class TestGmailHistorySystem:
     async def test_get_incremental_emails_success(self, mock_gmail_service):
         """Test successful incremental email fetching."""
         with patch('app.services.gmail_client.get_gmail_service_for_user', return_value=mock_gmail_service), \
-             patch('app.db.email_db.email_db.already_classified', return_value=False), \
-             patch('app.db.email_db.email_db.save_email', return_value=True), \
-             patch('app.services.classifier.classify_email', return_value="Test Category"), \
-             patch('app.utils.llm_utils.summarize_to_bullets', return_value=["Test summary"]), \
-             patch('app.utils.gmail_parser.extract_email_body', return_value="test body"):
+             patch('app.services.gmail_client.email_db.get_classified_ids', AsyncMock(return_value=set())), \
+             patch('app.services.gmail_client.email_db.save_emails_bulk', AsyncMock(side_effect=lambda docs: docs)), \
+             patch('app.services.gmail_client.classify_email', return_value="Test Category"), \
+             patch('app.services.gmail_client.summarize_to_bullets_async', AsyncMock(return_value=["Test summary"])), \
+             patch('app.services.gmail_client.extract_email_body', return_value="test body"):
             
             emails = await get_incremental_emails("user123", "12344")
             assert len(emails) == 1
@@ -133,8 +160,17 @@ class TestGmailHistorySystem:
 class TestWebhookIntegration:
     """Test webhook integration with proper mocking."""
     
+    @pytest.fixture
+    def mock_gmail_service(self):
+        """Mock Gmail service whose history has no new messages since the stored historyId."""
+        mock_service = Mock()
+        mock_history = Mock()
+        mock_history.execute.return_value = {"history": []}
+        mock_service.users.return_value.history.return_value.list.return_value = mock_history
+        return mock_service
+    
     @pytest.mark.asyncio
-    async def test_webhook_with_history_id(self):
+    async def test_webhook_with_history_id(self, mock_gmail_service):
         """Test webhook processing with historyId."""
         from app.routers.webhook import gmail_push_webhook
         from fastapi import Request
@@ -142,24 +178,20 @@ class TestWebhookIntegration:
         
         # Create mock request
         mock_request = AsyncMock(spec=Request)
-        mock_request.headers = {
-            'host': 'testserver',
-            'accept': '*/*',
-            'content-type': 'application/json'
-        }
+        mock_request.headers = dict(WEBHOOK_HEADERS)
         mock_request.json = AsyncMock(return_value={
             "emailAddress": "test@example.com",
             "historyId": "12346"
         })
         
         with patch('app.routers.webhook.get_user_id_by_email', return_value="user123"), \
-             patch('app.db.base.get_user_history_id', return_value="12345"), \
-             patch('app.services.gmail_client.get_incremental_emails', return_value=[]), \
-             patch('app.db.base.set_user_history_id') as mock_set_history:
+             patch('app.routers.webhook.get_user_history_id', return_value="12345"), \
+             patch('app.services.gmail_client.get_gmail_service_for_user', return_value=mock_gmail_service), \
+             patch('app.routers.webhook.set_user_history_id') as mock_set_history:
             
             response = await gmail_push_webhook(mock_request)
             assert response.status_code == 200
-            assert json.loads(response.body.decode()) == {"status": "success", "processed": 0}
+            assert orjson.loads(response.body) == {"status": "success", "processed": 0}
             mock_set_history.assert_called_once_with("user123", "12346")
     
     @pytest.mark.asyncio
@@ -171,62 +203,38 @@ class TestWebhookIntegration:
         
         # Create mock request
         mock_request = AsyncMock(spec=Request)
-        mock_request.headers = {
-            'host': 'testserver',
-            'accept': '*/*',
-            'content-type': 'application/json'
-        }
+        mock_request.headers = dict(WEBHOOK_HEADERS)
         mock_request.json = AsyncMock(return_value={
             "emailAddress": "test@example.com"
         })
         
         with patch('app.routers.webhook.get_user_id_by_email', return_value="user123"), \
-             patch('app.db.base.get_user_history_id', return_value=None), \
-             patch('app.services.email_ingestion.fetch_and_process_new_emails', return_value=5):
+             patch('app.routers.webhook.get_user_history_id', return_value=None), \
+             patch('app.routers.webhook.fetch_and_process_new_emails', return_value=5):
             
             response = await gmail_push_webhook(mock_request)
             assert response.status_code == 200
-            assert json.loads(response.body.decode()) == {"status": "success", "processed": 5}
+            assert orjson.loads(response.body) == {"status": "success", "processed": 5}
     
     @pytest.mark.asyncio
-    async def test_webhook_pubsub_message(self):
+    async def test_webhook_pubsub_message(self, mock_gmail_service):
         """Test webhook processing with Pub/Sub encoded message."""
         from app.routers.webhook import gmail_push_webhook
         from fastapi import Request
         from unittest.mock import AsyncMock
-        import base64
-        import json as pyjson
-        
-        # Create Pub/Sub style payload
-        webhook_data = {
-            "emailAddress": "test@example.com",
-            "historyId": "12346"
-        }
-        encoded_data = base64.b64encode(pyjson.dumps(webhook_data).encode()).decode()
-        
-        pubsub_payload = {
-            "message": {
-                "data": encoded_data
-            }
-        }
-        
         # Create mock request
         mock_request = AsyncMock(spec=Request)
-        mock_request.headers = {
-            'host': 'testserver',
-            'accept': '*/*',
-            'content-type': 'application/json'
-        }
-        mock_request.json = AsyncMock(return_value=pubsub_payload)
+        mock_request.headers = dict(WEBHOOK_HEADERS)
+        mock_request.json = AsyncMock(return_value=copy.deepcopy(PUBSUB_PAYLOAD))
         
         with patch('app.routers.webhook.get_user_id_by_email', return_value="user123"), \
-             patch('app.db.base.get_user_history_id', return_value="12345"), \
-             patch('app.services.gmail_client.get_incremental_emails', return_value=[]), \
-             patch('app.db.base.set_user_history_id') as mock_set_history:
+             patch('app.routers.webhook.get_user_history_id', return_value="12345"), \
+             patch('app.services.gmail_client.get_gmail_service_for_user', return_value=mock_gmail_service), \
+             patch('app.routers.webhook.set_user_history_id') as mock_set_history:
             
             response = await gmail_push_webhook(mock_request)
             assert response.status_code == 200
-            assert json.loads(response.body.decode()) == {"status": "success", "processed": 0}
+            assert orjson.loads(response.body) == {"status": "success", "processed": 0}
             mock_set_history.assert_called_once_with("user123", "12346")
 
 class TestHistoryIdDatabase:
@@ -1,8 +1,13 @@
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 from datetime import datetime
 from app.services.google_oauth import GoogleOAuthService
 from app.models.user import UserGmailStatus, GmailTokens
+from tests._fixtures import EXPECTED_GMAIL_SCOPES
+
+# Fixed timestamp for fixture data, so every run builds identical documents
+FROZEN_NOW = datetime(2024, 1, 1)
+FROZEN_NOW_ISO = FROZEN_NOW.isoformat()
 
 class TestGmailWorkflow:
     """Test cases for the complete Gmail OAuth workflow."""
@@ -26,70 +31,38 @@ class TestGmailWorkflow:
             "email": "test@example.com",
             "is_gmail_connected": True,
             "gmail_email": "test@gmail.com",
-            "gmail_connected_at": datetime.utcnow().isoformat()
+            "gmail_connected_at": FROZEN_NOW_ISO
         }
     
     @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "user_fixture, expected_status",
+        [
+            ("mock_user_data", {"is_connected": False, "gmail_email": None, "last_sync": None}),
+            ("mock_connected_user_data", {"is_connected": True, "gmail_email": "test@gmail.com", "last_sync": FROZEN_NOW_ISO}),
+            (None, {"is_connected": False, "gmail_email": None, "last_sync": None}),
+        ],
+        ids=["not_connected", "connected", "user_not_found"],
+    )
     @patch('app.services.google_oauth.get_mongo_client')
-    async def test_check_gmail_connection_status_not_connected(self, mock_get_mongo_client, mock_user_data):
-        """Test checking Gmail connection status when user is not connected."""
-        service = GoogleOAuthService()
-        
-        # Mock database
-        mock_db = Mock()
-        mock_collection = AsyncMock()
-        mock_collection.find_one.return_value = mock_user_data
-        mock_db.__getitem__.return_value = mock_collection
-        mock_get_mongo_client.return_value = mock_db
-        
-        # Test status check
-        result = await service.check_gmail_connection_status("user_2xYk123")
-        
-        assert result["is_gmail_connected"] is False
-        assert result["user_id"] == "user_2xYk123"
-        assert result["email"] == "test@example.com"
-        assert "not connected" in result["message"]
-    
-    @pytest.mark.asyncio
-    @patch('app.services.google_oauth.get_mongo_client')
-    async def test_check_gmail_connection_status_connected(self, mock_get_mongo_client, mock_connected_user_data):
-        """Test checking Gmail connection status when user is connected."""
-        service = GoogleOAuthService()
-        
-        # Mock database
-        mock_db = Mock()
-        mock_collection = AsyncMock()
-        mock_collection.find_one.return_value = mock_connected_user_data
-        mock_db.__getitem__.return_value = mock_collection
-        mock_get_mongo_client.return_value = mock_db
-        
-        # Test status check
-        result = await service.check_gmail_connection_status("user_2xYk123")
-        
-        assert result["is_gmail_connected"] is True
-        assert result["user_id"] == "user_2xYk123"
-        assert result["email"] == "test@example.com"
-        assert "connected" in result["message"]
-    
-    @pytest.mark.asyncio
-    @patch('app.services.google_oauth.get_mongo_client')
-    async def test_check_gmail_connection_status_user_not_found(self, mock_get_mongo_client):
-        """Test checking Gmail connection status when user is not found."""
+    async def test_check_gmail_connection_status(self, mock_get_mongo_client, request, user_fixture, expected_status):
+        """Test checking Gmail connection status for a disconnected, a connected and an unknown user."""
         service = GoogleOAuthService()
+        # Only build the user document the case needs
+        user_data = request.getfixturevalue(user_fixture) if user_fixture else None
         
-        # Mock database
-        mock_db = Mock()
+        # Mock database; MagicMock supports db[collection_name]
+        mock_db = MagicMock()
         mock_collection = AsyncMock()
-        mock_collection.find_one.return_value = None
+        mock_collection.find_one.return_value = user_data
         mock_db.__getitem__.return_value = mock_collection
         mock_get_mongo_client.return_value = mock_db
         
         # Test status check
         result = await service.check_gmail_connection_status("user_2xYk123")
         
-        assert result["is_gmail_connected"] is False
-        assert result["user_id"] == "user_2xYk123"
-        assert result["message"] == "User not found"
+        assert result == expected_status
+        mock_collection.find_one.assert_awaited_once_with({"clerk_user_id": "user_2xYk123"})
     
     @pytest.mark.asyncio
     @patch('app.services.google_oauth.get_mongo_client')
@@ -191,19 +164,7 @@ class TestGmailWorkflowIntegration:
         """Test that Gmail scopes match the workflow requirements."""
         from app.services.google_oauth import GMAIL_SCOPES
         
-        expected_scopes = [
-            "openid",
-            "https://www.googleapis.com/auth/userinfo.email",
-            "https://www.googleapis.com/auth/userinfo.profile",
-            "https://www.googleapis.com/auth/gmail.readonly",
-            "https://www.googleapis.com/auth/gmail.modify",
-            "https://www.googleapis.com/auth/gmail.send",
-            "https://www.googleapis.com/auth/gmail.labels",
-            "https://www.googleapis.com/auth/gmail.settings.basic"
-        ]
-        
-        assert GMAIL_SCOPES == expected_scopes
-        assert len(GMAIL_SCOPES) == 8
+        assert tuple(GMAIL_SCOPES) == EXPECTED_GMAIL_SCOPES
     
     def test_user_model_includes_gmail_fields(self):
         """Test that UserInDB model includes Gmail connection fields."""
@@ -213,8 +174,8 @@ class TestGmailWorkflowIntegration:
         user = UserInDB(
             clerk_user_id="user_2xYk123",
             email="test@example.com",
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            created_at=FROZEN_NOW,
+            updated_at=FROZEN_NOW
         )
         
         # Check that Gmail fields are present with default values
@@ -231,7 +192,7 @@ class TestGmailWorkflowIntegration:
             user_id="user_2xYk123",
             is_gmail_connected=True,
             gmail_email="test@gmail.com",
-            gmail_connected_at=datetime.utcnow(),
+            gmail_connected_at=FROZEN_NOW,
             message="Gmail connected"
         )
         
@@ -245,7 +206,7 @@ class TestGmailWorkflowIntegration:
         tokens = GmailTokens(
             access_token="access_token_123",
             refresh_token="refresh_token_123",
-            expires_at=datetime.utcnow()
+            expires_at=FROZEN_NOW
         )
         
         assert tokens.access_token == "access_token_123"
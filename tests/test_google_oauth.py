@@ -2,25 +2,14 @@ import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from app.services.google_oauth import GoogleOAuthService, GMAIL_SCOPES
 from app.core.config import settings
+from tests._fixtures import EXPECTED_GMAIL_SCOPES
 
 class TestGoogleOAuthService:
     """Test cases for Google OAuth service."""
     
     def test_gmail_scopes(self):
         """Test that Gmail scopes are correctly defined."""
-        expected_scopes = [
-            "openid",
-            "email", 
-            "profile",
-            "https://www.googleapis.com/auth/gmail.readonly",
-            "https://www.googleapis.com/auth/gmail.modify",
-            "https://www.googleapis.com/auth/gmail.send",
-            "https://www.googleapis.com/auth/gmail.labels",
-            "https://www.googleapis.com/auth/gmail.settings.basic"
-        ]
-        
-        assert GMAIL_SCOPES == expected_scopes
-        assert len(GMAIL_SCOPES) == 8
+        assert tuple(GMAIL_SCOPES) == EXPECTED_GMAIL_SCOPES
     
     def test_oauth_service_initialization(self):
         """Test OAuth service initialization."""
@@ -1,85 +1,78 @@
-from app.db import email_db
-from app.services.classifier import classify_email
-from datetime import datetime
-import asyncio
+from app.db.email_db import MongoDBStorage
+from mongomock_motor import AsyncMongoMockClient
+import pytest
+import pytest_asyncio
 
-async def test_mongodb_storage():
-    """Test all MongoDB storage functionality."""
-    print("\n🔍 Testing MongoDB Storage...")
-    
-    # Test data
-    test_emails = [
-        {
-            "subject": "Product Review Request",
-            "body": "Would you like to review our new AI tool? We'd love your feedback on our latest features."
-        },
-        {
-            "subject": "Meeting Request: Project Discussion",
-            "body": "Let's schedule a meeting to discuss the project timeline and deliverables for next week."
-        },
-        {
-            "subject": "Job Offer - Senior Developer Position",
-            "body": "We were impressed by your profile and would like to offer you a position as Senior Developer."
-        }
+TEST_USER_ID = "user_2ygYPzJWTNMDyyCVV3Rk31U89oV"
+
+# Test data
+TEST_EMAILS = [
+    {
+        "gmail_id": "test-storage-1",
+        "subject": "Product Review Request",
+        "body": "Would you like to review our new AI tool? We'd love your feedback on our latest features."
+    },
+    {
+        "gmail_id": "test-storage-2",
+        "subject": "Meeting Request: Project Discussion",
+        "body": "Let's schedule a meeting to discuss the project timeline and deliverables for next week."
+    },
+    {
+        "gmail_id": "test-storage-3",
+        "subject": "Job Offer - Senior Developer Position",
+        "body": "We were impressed by your profile and would like to offer you a position as Senior Developer."
+    }
+]
+
+# Category each test email is stored with
+EXPECTED_CATEGORIES = {
+    "Product Review Request": "Product Review",
+    "Meeting Request: Project Discussion": "Meeting Request",
+    "Job Offer - Senior Developer Position": "Job Offer",
+}
+
+@pytest_asyncio.fixture
+async def storage():
+    """Empty email storage backed by an in-memory Mongo fake, so no database is touched."""
+    collection = AsyncMongoMockClient()["test"]["emails"]
+    await collection.create_index("gmail_id", unique=True)
+    yield MongoDBStorage(collection=collection)
+
+@pytest.fixture
+def classified_emails():
+    """Test emails as the app stores them once classified."""
+    return [
+        {**email, "category": EXPECTED_CATEGORIES[email["subject"]], "user_id": TEST_USER_ID}
+        for email in TEST_EMAILS
     ]
-    
-    # Test 1: Classify and Save emails
-    print("\n📝 Test 1: Classifying and Saving Emails")
-    for email in test_emails:
-        # Classify the email
-        category = classify_email(email['subject'], email['body'])
-        if category.startswith("Error:"):
-            print(f"❌ Classification failed for '{email['subject']}': {category}")
-            continue
-            
-        # Add category to email
-        email['category'] = category
-        # Add user_id to email
-        email['user_id'] = "user_2ygYPzJWTNMDyyCVV3Rk31U89oV"
-        
-        # Save the email
-        result = await email_db.save_email(email)
-        print(f"Saved email '{email['subject']}': {'Success' if result else 'Skipped (duplicate)'}")
-    
-    # Test 2: Try to save duplicate
-    print("\n🔄 Test 2: Duplicate Check")
-    # Ensure user_id is present for duplicate test
-    test_emails[0]['user_id'] = "user_2ygYPzJWTNMDyyCVV3Rk31U89oV"
-    duplicate_result = await email_db.save_email(test_emails[0])
-    print(f"Attempted to save duplicate: {'Skipped (expected)' if not duplicate_result else 'Error: Should have been skipped'}")
-    
-    # Test 3: Load all emails
-    print("\n📥 Test 3: Loading All Emails")
-    all_emails = await email_db.load_emails()
-    print(f"Found {len(all_emails)} emails:")
-    for email in all_emails:
-        print(f"- {email['subject']} ({email['category']})")
-    
-    # Test 4: Load limited emails
-    print("\n📊 Test 4: Loading Limited Emails")
-    limited_emails = await email_db.load_emails()
-    print(f"Found {len(limited_emails)} emails:")
-    for email in limited_emails[:2]:  # Limit to first 2
-        print(f"- {email['subject']}")
-    
-    # Test 5: Find specific email
-    print("\n🔎 Test 5: Finding Specific Email")
-    test_subject = "Meeting Request: Project Discussion"
-    found_email = await email_db.get_email_by_subject(test_subject)
-    if found_email:
-        print(f"Found email: {found_email['subject']} ({found_email['category']})")
-    else:
-        print(f"Email with subject '{test_subject}' not found")
-    
-    # Test 6: Find non-existent email
-    print("\n❌ Test 6: Finding Non-existent Email")
-    non_existent = await email_db.get_email_by_subject("This Email Doesn't Exist")
-    print(f"Result for non-existent email: {'Not found (expected)' if non_existent is None else 'Error: Should not have been found'}")
 
-if __name__ == "__main__":
-    try:
-        asyncio.run(test_mongodb_storage())
-    finally:
-        # Always close the connection
-        from app.db.base import db
-        asyncio.run(db.close_db()) 
\ No newline at end of file
+@pytest_asyncio.fixture
+async def seeded_storage(storage, classified_emails):
+    """Storage that already holds every classified test email."""
+    await storage.collection.insert_many([dict(email) for email in classified_emails])
+    return storage
+
+@pytest.mark.asyncio
+async def test_save_emails(storage, classified_emails):
+    """All classified emails are saved with a single insert_many."""
+    saved = await storage.save_emails_bulk([dict(email) for email in classified_emails])
+    assert [email["gmail_id"] for email in saved] == [email["gmail_id"] for email in TEST_EMAILS]
+    assert [email["category"] for email in saved] == [EXPECTED_CATEGORIES[email["subject"]] for email in TEST_EMAILS]
+
+@pytest.mark.asyncio
+async def test_duplicate_is_skipped(seeded_storage, classified_emails):
+    """Saving an email whose gmail_id already exists is rejected."""
+    assert not await seeded_storage.save_email(dict(classified_emails[0]))
+
+@pytest.mark.asyncio
+async def test_load_emails(seeded_storage):
+    """All saved emails load back."""
+    all_emails = await seeded_storage.load_emails()
+    assert {email["gmail_id"] for email in all_emails} == {email["gmail_id"] for email in TEST_EMAILS}
+
+@pytest.mark.asyncio
+async def test_find_email_by_subject(seeded_storage):
+    """An existing subject is found and a missing one returns None."""
+    found = await seeded_storage.get_email_by_subject("Meeting Request: Project Discussion")
+    assert found["gmail_id"] == "test-storage-2"
+    assert await seeded_storage.get_email_by_subject("This Email Doesn't Exist") is None